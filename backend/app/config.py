@@ -0,0 +1,61 @@
+import os
+from typing import Optional
+from dotenv import load_dotenv
+from pydantic_settings import BaseSettings
+
+load_dotenv()
+
+class Settings(BaseSettings):
+    """Application settings, read from environment variables (and .env)"""
+
+    # Database configuration
+    postgres_user: str = "postgres"
+    postgres_password: str
+    postgres_host: str = "127.0.0.1"
+    postgres_port: int = 5432
+    postgres_db: str = "trading_analysis"
+
+    # Connection pool. Each Uvicorn worker has its own pool, so the total is
+    # workers * (pool_size + db_max_overflow); keep it under Postgres max_connections.
+    # db_pool_size defaults to each worker's share of db_max_connections.
+    sql_echo: bool = False
+    db_max_connections: int = 80
+    db_pool_size: Optional[int] = None
+    db_max_overflow: int = 2
+
+    # Redis configuration
+    redis_host: str = "127.0.0.1"
+    redis_port: int = 6379
+    redis_password: str
+
+    # TimescaleDB hypertables (opt-in for plain PostgreSQL installs)
+    enable_timescale: bool = False
+    timescale_chunk_interval: str = "1 day"
+
+    # Server / workers
+    debug: bool = False
+    web_concurrency: Optional[int] = None
+    ml_pool_workers: int = 2
+
+    @property
+    def workers(self) -> int:
+        """Uvicorn worker processes (a single auto-reloading one in debug)"""
+        if self.debug:
+            return 1
+        return self.web_concurrency or os.cpu_count() or 1
+
+    @property
+    def pool_size(self) -> int:
+        """Persistent connections per worker"""
+        if self.db_pool_size is not None:
+            return self.db_pool_size
+        return max(1, min(20, self.db_max_connections // self.workers - self.db_max_overflow))
+
+    @property
+    def database_url(self) -> str:
+        return (
+            f"postgresql+asyncpg://{self.postgres_user}:{self.postgres_password}"
+            f"@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
+        )
+
+settings = Settings()
@@ -0,0 +1,123 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
+from sqlalchemy import insert
+from .connection import engine
+from .models import TechnicalIndicators
+
+PREDICTION_COLUMNS = [
+    "symbol",
+    "model_type",
+    "prediction_horizon",
+    "predicted_price",
+    "confidence_score",
+    "timestamp"
+]
+
+async def copy_records(table: str, columns: List[str], rows: Sequence[tuple]):
+    """Write rows to a table with a single binary COPY FROM STDIN"""
+    async with engine.connect() as conn:
+        raw_conn = await conn.get_raw_connection()
+        await raw_conn.driver_connection.copy_records_to_table(
+            table, records=rows, columns=columns
+        )
+
+async def copy_predictions(rows: Sequence[tuple]):
+    """Bulk write ML prediction rows (ordered as PREDICTION_COLUMNS)"""
+    await copy_records("ml_predictions", PREDICTION_COLUMNS, rows)
+
+async def insert_indicators(rows: List[Dict[str, Any]]):
+    """Bulk write technical indicator rows with one executemany INSERT"""
+    async with engine.begin() as conn:
+        await conn.execute(insert(TechnicalIndicators), rows)
+
+class BatchWriter:
+    """Buffer rows in memory and flush them in batches from a background task"""
+
+    def __init__(
+        self,
+        flush: Callable[[List[Any]], Awaitable[None]],
+        max_batch: int = 5000,
+        interval: float = 0.5,
+        maxsize: int = 0
+    ):
+        self.flush = flush
+        self.max_batch = max_batch
+        self.interval = interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self._task = None
+        self._stopping = False
+
+    def put(self, row: Any) -> bool:
+        """Queue a row for the next flush; sheds the row if the buffer is full"""
+        try:
+            self.queue.put_nowait(row)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    async def _collect(self, batch: List[Any]):
+        """Wait for a first row, then gather more until the batch is full or the interval elapses"""
+        loop = asyncio.get_running_loop()
+        batch.append(await self.queue.get())
+        deadline = loop.time() + self.interval
+
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def _write(self, batch: List[Any]):
+        try:
+            await self.flush(batch)
+        except Exception as e:
+            print(f"Error flushing {len(batch)} buffered rows: {e}")
+
+    async def run(self):
+        while not self._stopping:
+            batch = []
+            try:
+                await self._collect(batch)
+            finally:
+                # Also reached on cancellation so rows already dequeued are not lost
+                if batch:
+                    await self._write(batch)
+
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Cancel the consumer and flush whatever is still queued"""
+        if self._task is not None:
+            # wait_for can swallow the cancel when its get() has just completed
+            # (Python < 3.12); the flag still ends the loop after that batch
+            self._stopping = True
+            self._task.cancel()
+            # asyncio.wait leaves a cancel aimed at the caller of stop() propagating
+            await asyncio.wait([self._task])
+            self._task = None
+
+        remaining = []
+        while not self.queue.empty():
+            remaining.append(self.queue.get_nowait())
+        for i in range(0, len(remaining), self.max_batch):
+            await self._write(remaining[i:i + self.max_batch])
+
+# Coalesce concurrent /predict writes into one COPY per 50 ms window
+prediction_writer = BatchWriter(copy_predictions, max_batch=5000, interval=0.05, maxsize=10000)
+
+# Indicator snapshots are only read back historically, so flush them once a second
+indicator_writer = BatchWriter(insert_indicators, max_batch=1000, interval=1.0, maxsize=10000)
@@ -1,52 +1,58 @@
-from sqlalchemy import create_engine
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import redis
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# Database configuration from middleware
-POSTGRES_USER = "postgres"
-POSTGRES_PASSWORD = "xzIccYLZ"
-POSTGRES_HOST = "127.0.0.1"
-POSTGRES_PORT = "5432"
-POSTGRES_DB = "trading_analysis"
-
-# Redis configuration from middleware
-REDIS_HOST = "127.0.0.1"
-REDIS_PORT = "6379"
-REDIS_PASSWORD = "bbMhNkqt"
+import redis.asyncio as redis
+from ..config import settings
+
+# Create async engine (asyncpg driver) with a pool sized per worker process
+engine = create_async_engine(
+    settings.database_url,
+    echo=settings.sql_echo,
+    pool_size=settings.pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    pool_timeout=30,
+    connect_args={"server_settings": {"statement_timeout": "60000"}}
+)
 
-# Database URL
-DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+# Advisory lock key shared by every worker that runs startup DDL
+SCHEMA_LOCK_KEY = 7421930518
 
-# Create engine
-engine = create_engine(DATABASE_URL, echo=True)
+async def lock_schema(conn):
+    """Serialize schema changes across workers until the transaction ends"""
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
 
 # Create session
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 # Create base class
 Base = declarative_base()
 
-# Redis connection
+# Redis connection (asyncio client)
 redis_client = redis.Redis(
-    host=REDIS_HOST,
-    port=REDIS_PORT,
-    password=REDIS_PASSWORD,
+    host=settings.redis_host,
+    port=settings.redis_port,
+    password=settings.redis_password,
     decode_responses=True
 )
 
+# Redis connection for binary payloads (encoded DataFrames)
+redis_binary_client = redis.Redis(
+    host=settings.redis_host,
+    port=settings.redis_port,
+    password=settings.redis_password
+)
+
 # Dependency to get database session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # Function to get Redis client
 def get_redis():
-    return redis_client
\ No newline at end of file
+    return redis_client
+
+# Function to get Redis client for binary values
+def get_redis_binary():
+    return redis_binary_client
\ No newline at end of file
@@ -1,9 +1,10 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, JSON, Index
 from sqlalchemy.sql import func
 from .connection import Base
 
 class MarketData(Base):
     __tablename__ = "market_data"
+    __table_args__ = (Index("ix_market_data_symbol_timestamp", "symbol", "timestamp"),)
     
     id = Column(Integer, primary_key=True, index=True)
     symbol = Column(String(20), index=True, nullable=False)
@@ -16,6 +17,7 @@ class MarketData(Base):
     
 class TechnicalIndicators(Base):
     __tablename__ = "technical_indicators"
+    __table_args__ = (Index("ix_technical_indicators_symbol_timestamp", "symbol", "timestamp"),)
     
     id = Column(Integer, primary_key=True, index=True)
     symbol = Column(String(20), index=True, nullable=False)
@@ -39,6 +41,7 @@ class TechnicalIndicators(Base):
 
 class SentimentAnalysis(Base):
     __tablename__ = "sentiment_analysis"
+    __table_args__ = (Index("ix_sentiment_analysis_symbol_timestamp", "symbol", "timestamp"),)
     
     id = Column(Integer, primary_key=True, index=True)
     symbol = Column(String(20), index=True, nullable=False)
@@ -51,6 +54,7 @@ class SentimentAnalysis(Base):
 
 class MLPredictions(Base):
     __tablename__ = "ml_predictions"
+    __table_args__ = (Index("ix_ml_predictions_symbol_timestamp", "symbol", "timestamp"),)
     
     id = Column(Integer, primary_key=True, index=True)
     symbol = Column(String(20), index=True, nullable=False)
@@ -63,6 +67,7 @@ class MLPredictions(Base):
 
 class OptionsData(Base):
     __tablename__ = "options_data"
+    __table_args__ = (Index("ix_options_data_symbol_timestamp", "symbol", "timestamp"),)
     
     id = Column(Integer, primary_key=True, index=True)
     symbol = Column(String(20), index=True, nullable=False)
@@ -77,6 +82,7 @@ class OptionsData(Base):
 
 class TradingRecommendations(Base):
     __tablename__ = "trading_recommendations"
+    __table_args__ = (Index("ix_trading_recommendations_symbol_timestamp", "symbol", "timestamp"),)
     
     id = Column(Integer, primary_key=True, index=True)
     symbol = Column(String(20), index=True, nullable=False)
@@ -91,4 +97,10 @@ class TradingRecommendations(Base):
     ml_reasoning = Column(Text)
     risk_level = Column(String(20))  # LOW, MEDIUM, HIGH
     is_options = Column(Boolean, default=False)
-    option_strategy = Column(String(50), nullable=True)
\ No newline at end of file
+    option_strategy = Column(String(50), nullable=True)
+
+def create_missing_indexes(connection):
+    """Create indexes that create_all skips because their table already exists"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
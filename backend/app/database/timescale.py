@@ -0,0 +1,41 @@
+from sqlalchemy import text
+from ..config import settings
+from .connection import lock_schema
+
+# Append-only time-series tables partitioned by timestamp when TimescaleDB is enabled
+HYPERTABLES = ("market_data", "technical_indicators", "ml_predictions")
+CHUNK_TIME_INTERVAL = settings.timescale_chunk_interval
+
+def timescale_enabled() -> bool:
+    """Hypertables are opt-in so plain PostgreSQL installs keep working"""
+    return settings.enable_timescale
+
+async def create_hypertables(conn):
+    """Convert the time-series tables to TimescaleDB hypertables (idempotent)"""
+    # Re-entrant within the lifespan transaction; keeps the check below race-free
+    await lock_schema(conn)
+    await conn.execute(text("CREATE EXTENSION IF NOT EXISTS timescaledb"))
+
+    for table in HYPERTABLES:
+        is_hypertable = await conn.scalar(
+            text(
+                "SELECT EXISTS (SELECT 1 FROM timescaledb_information.hypertables "
+                "WHERE hypertable_name = :table)"
+            ),
+            {"table": table}
+        )
+        if is_hypertable:
+            continue
+
+        # Unique constraints on a hypertable must include the partitioning column
+        await conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_pkey"))
+        await conn.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY (id, timestamp)"))
+        # asyncpg binds interval parameters as timedelta, so pass the setting as text
+        await conn.execute(
+            text(
+                f"SELECT create_hypertable('{table}', 'timestamp', "
+                "chunk_time_interval => CAST(CAST(:interval AS TEXT) AS INTERVAL), "
+                "migrate_data => TRUE, if_not_exists => TRUE)"
+            ),
+            {"interval": CHUNK_TIME_INTERVAL}
+        )
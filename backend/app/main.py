@@ -1,22 +1,50 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
+from typing import Any, Dict
 import uvicorn
-import os
 from dotenv import load_dotenv
 
-from app.database.connection import engine, SessionLocal
-from app.database.models import Base
+from app.config import settings
+from app.database.connection import engine, SessionLocal, lock_schema
+from app.database.models import Base, create_missing_indexes
+from app.database.bulk import indicator_writer, prediction_writer
+from app.database.timescale import timescale_enabled, create_hypertables
 from app.routers import market_data, technical_analysis, sentiment, ml_predictions, options_analysis
 
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Every worker runs the lifespan; the advisory lock lets one apply the DDL
+    # while the rest wait and then find the schema already in place
+    async with engine.begin() as conn:
+        await lock_schema(conn)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_missing_indexes)
+        if timescale_enabled():
+            await create_hypertables(conn)
+    
+    # Background writers that batch ML prediction and indicator inserts
+    prediction_writer.start()
+    indicator_writer.start()
+    # Keep the index history warm so technical analysis requests skip Yahoo
+    technical_analysis.start_history_refresher()
+    yield
+    await technical_analysis.stop_history_refresher()
+    await indicator_writer.stop()
+    await prediction_writer.stop()
+    ml_predictions.process_pool.shutdown(wait=False, cancel_futures=True)
+
 # Create FastAPI app
 app = FastAPI(
     title="Trading Analysis Platform API",
     description="Comprehensive trading analysis platform for Indian stock markets",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -28,8 +56,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Compress larger responses (historical data, prediction history)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 # Include routers
 app.include_router(market_data.router, prefix="/api/market", tags=["Market Data"])
@@ -39,12 +67,12 @@ app.include_router(ml_predictions.router, prefix="/api/ml", tags=["ML Prediction
 app.include_router(options_analysis.router, prefix="/api/options", tags=["Options Analysis"])
 
 @app.get("/")
-async def root():
+async def root() -> Dict[str, Any]:
     return {"message": "Trading Analysis Platform API", "status": "running"}
 
 @app.get("/health")
-async def health_check():
-    return {"status": "healthy", "service": "backend"}
+async def health_check() -> Dict[str, Any]:
+    return {"status": "healthy", "service": "backend", "db_pool": engine.pool.status()}
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -54,10 +82,22 @@ async def global_exception_handler(request, exc):
     )
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+    if settings.debug:
+        # Single auto-reloading worker for local development
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True,
+            log_level="info"
+        )
+    else:
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            loop="uvloop",
+            http="httptools",
+            workers=settings.workers,
+            log_level="warning"
+        )
\ No newline at end of file
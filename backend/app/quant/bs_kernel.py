@@ -0,0 +1,101 @@
+import math
+from typing import Dict
+import numpy as np
+from numba import njit
+
+INV_SQRT_2PI = 0.3989422804014327
+SQRT1_2 = 0.7071067811865476
+
+# Column layout of the `out_greeks` array filled by price_chain
+CALL_DELTA, PUT_DELTA, GAMMA, VEGA, CALL_THETA, PUT_THETA = range(6)
+
+@njit(fastmath=True, cache=True)
+def price_chain(S, K, T, r, sigma, out_call, out_put, out_greeks):
+    """Fused Black-Scholes premiums and Greeks for every strike in K
+
+    Strikes that cannot be priced (non-positive S, K, T or sigma) get zeros,
+    matching price_option.
+    """
+    if S <= 0.0 or T <= 0.0 or sigma <= 0.0:
+        out_call[:] = 0.0
+        out_put[:] = 0.0
+        out_greeks[:, :] = 0.0
+        return
+
+    sqrtT = math.sqrt(T)
+    disc = math.exp(-r * T)
+    sigma_sqrtT = sigma * sqrtT
+    drift = (r + 0.5 * sigma * sigma) * T
+
+    for i in range(K.shape[0]):
+        if K[i] <= 0.0:
+            out_call[i] = 0.0
+            out_put[i] = 0.0
+            out_greeks[i, :] = 0.0
+            continue
+
+        d1 = (math.log(S / K[i]) + drift) / sigma_sqrtT
+        d2 = d1 - sigma_sqrtT
+        nd1 = 0.5 * math.erfc(-d1 * SQRT1_2)
+        nd2 = 0.5 * math.erfc(-d2 * SQRT1_2)
+        pdf = INV_SQRT_2PI * math.exp(-0.5 * d1 * d1)
+        k_disc = K[i] * disc
+
+        out_call[i] = max(0.0, S * nd1 - k_disc * nd2)
+        out_put[i] = max(0.0, k_disc * (1.0 - nd2) - S * (1.0 - nd1))
+
+        theta_common = -(S * pdf * sigma) / (2.0 * sqrtT)
+        out_greeks[i, CALL_DELTA] = nd1
+        out_greeks[i, PUT_DELTA] = nd1 - 1.0
+        out_greeks[i, GAMMA] = pdf / (S * sigma_sqrtT)
+        out_greeks[i, VEGA] = S * pdf * sqrtT / 100.0
+        out_greeks[i, CALL_THETA] = (theta_common - r * k_disc * nd2) / 365.0
+        out_greeks[i, PUT_THETA] = (theta_common + r * k_disc * (1.0 - nd2)) / 365.0
+
+def chain_greeks(S: float, K: np.ndarray, T: float, r: float, sigma: float) -> Dict[str, np.ndarray]:
+    """Allocate outputs, run the kernel once and return named arrays"""
+    K = np.ascontiguousarray(K, dtype=np.float64)
+    n = K.shape[0]
+    out_call = np.empty(n)
+    out_put = np.empty(n)
+    out_greeks = np.empty((n, 6))
+
+    price_chain(float(S), K, float(T), float(r), float(sigma), out_call, out_put, out_greeks)
+
+    return {
+        'call_premium': out_call,
+        'put_premium': out_put,
+        'call_delta': out_greeks[:, CALL_DELTA],
+        'put_delta': out_greeks[:, PUT_DELTA],
+        'gamma': out_greeks[:, GAMMA],
+        'vega': out_greeks[:, VEGA],
+        'call_theta': out_greeks[:, CALL_THETA],
+        'put_theta': out_greeks[:, PUT_THETA]
+    }
+
+@njit(fastmath=True, cache=True)
+def price_option(S, K, T, r, sigma, is_call):
+    """Premium, delta, gamma, theta and vega for a single option"""
+    if S <= 0.0 or K <= 0.0 or T <= 0.0 or sigma <= 0.0:
+        return 0.0, 0.0, 0.0, 0.0, 0.0
+
+    sqrtT = math.sqrt(T)
+    disc = math.exp(-r * T)
+    sigma_sqrtT = sigma * sqrtT
+    d1 = (math.log(S / K) + (r + 0.5 * sigma * sigma) * T) / sigma_sqrtT
+    d2 = d1 - sigma_sqrtT
+    nd1 = 0.5 * math.erfc(-d1 * SQRT1_2)
+    nd2 = 0.5 * math.erfc(-d2 * SQRT1_2)
+    pdf = INV_SQRT_2PI * math.exp(-0.5 * d1 * d1)
+    k_disc = K * disc
+
+    gamma = pdf / (S * sigma_sqrtT)
+    vega = S * pdf * sqrtT / 100.0
+    theta_common = -(S * pdf * sigma) / (2.0 * sqrtT)
+
+    if is_call:
+        premium = max(0.0, S * nd1 - k_disc * nd2)
+        return premium, nd1, gamma, (theta_common - r * k_disc * nd2) / 365.0, vega
+
+    premium = max(0.0, k_disc * (1.0 - nd2) - S * (1.0 - nd1))
+    return premium, nd1 - 1.0, gamma, (theta_common + r * k_disc * (1.0 - nd2)) / 365.0, vega
@@ -0,0 +1,208 @@
+import math
+import numpy as np
+from numba import njit, prange, types
+
+# Fast-math without the no-NaN/no-Inf assumptions: the indicators rely on NaN
+# for "not enough history" and on x/0 -> inf for flat RSI windows
+FASTMATH_FLAGS = {"nsz", "arcp", "contract", "afn", "reassoc"}
+
+RSI_PERIOD = 14
+BB_PERIOD = 20
+BB_STD = 2.0
+ATR_PERIOD = 14
+ADX_PERIOD = 14
+SUPERTREND_PERIOD = 10
+SUPERTREND_MULTIPLIER = 3.0
+
+# compute_all is compiled eagerly for contiguous float32 OHLCV columns, so the
+# JIT cost is paid (or the on-disk cache loaded) at import, not on a request.
+# Read-only arrays also accept writable ones (pandas hands out read-only views).
+# Inputs are float32 to halve the data touched; sums and recurrences run in float64.
+_COLUMN = types.Array(types.float32, 1, "C", readonly=True)
+COMPUTE_ALL_SIGNATURE = types.Tuple((types.float64,) * 13 + (types.boolean,))(
+    _COLUMN, _COLUMN, _COLUMN, _COLUMN
+)
+
+# compute_batch takes one right-aligned row per symbol plus each row's first valid bar
+_ROWS = types.Array(types.float32, 2, "C", readonly=True)
+COMPUTE_BATCH_SIGNATURE = types.float64[:, ::1](
+    _ROWS, _ROWS, _ROWS, _ROWS, types.Array(types.int64, 1, "C", readonly=True)
+)
+
+@njit(fastmath=FASTMATH_FLAGS, error_model="numpy", cache=True)
+def _last_mean(values, window):
+    n = values.shape[0]
+    if n < window:
+        return np.nan
+    total = 0.0
+    for i in range(n - window, n):
+        total += values[i]
+    return total / window
+
+@njit(fastmath=FASTMATH_FLAGS, error_model="numpy", cache=True)
+def _wilder(values, period, start, out):
+    """Wilder smoothing of values[start:] into out: SMA seed, then s = (s*(period-1) + x) / period"""
+    n = values.shape[0]
+    for i in range(min(n, start + period - 1)):
+        out[i] = np.nan
+    if n < start + period:
+        return
+    total = 0.0
+    for i in range(start, start + period):
+        total += values[i]
+    s = total / period
+    out[start + period - 1] = s
+    for i in range(start + period, n):
+        s = (s * (period - 1) + values[i]) / period
+        out[i] = s
+
+@njit(COMPUTE_ALL_SIGNATURE, fastmath=FASTMATH_FLAGS, error_model="numpy", cache=True)
+def compute_all(high, low, close, volume):
+    """Every scalar indicator in one pass over the OHLCV arrays
+
+    Returns (vwap, ema_9, ema_21, macd, macd_signal, macd_histogram, rsi,
+    bb_upper, bb_middle, bb_lower, atr, adx, supertrend, supertrend_bullish).
+    """
+    n = close.shape[0]
+
+    # VWAP and the EMAs (recursive e = e + alpha * (x - e), seeded with the first close)
+    a9 = 2.0 / 10.0
+    a12 = 2.0 / 13.0
+    a21 = 2.0 / 22.0
+    a26 = 2.0 / 27.0
+    pv = 0.0
+    vol = 0.0
+    ema9 = ema12 = ema21 = ema26 = float(close[0])
+    macd = signal = 0.0
+
+    tr = np.empty(n)
+    plus_dm = np.empty(n)
+    minus_dm = np.empty(n)
+    gain = np.empty(n)
+    loss = np.empty(n)
+
+    for i in range(n):
+        h = high[i]
+        l = low[i]
+        c = close[i]
+
+        pv += (h + l + c) / 3.0 * volume[i]
+        vol += volume[i]
+
+        ema9 += a9 * (c - ema9)
+        ema12 += a12 * (c - ema12)
+        ema21 += a21 * (c - ema21)
+        ema26 += a26 * (c - ema26)
+        macd = ema12 - ema26
+        signal += a9 * (macd - signal)
+
+        # True range and directional movement; the first bar has no previous bar
+        if i == 0:
+            tr[i] = h - l
+            plus_dm[i] = 0.0
+            minus_dm[i] = 0.0
+            gain[i] = 0.0
+            loss[i] = 0.0
+        else:
+            pc = close[i - 1]
+            tr[i] = max(h - l, abs(h - pc), abs(l - pc))
+            up = h - high[i - 1]
+            down = low[i - 1] - l
+            plus_dm[i] = up if (up > down and up > 0.0) else 0.0
+            minus_dm[i] = down if (down > up and down > 0.0) else 0.0
+            delta = c - pc
+            gain[i] = delta if delta > 0.0 else 0.0
+            loss[i] = -delta if delta < 0.0 else 0.0
+
+    vwap = pv / vol
+
+    # RSI, ATR and ADX use Wilder smoothing over bars 1.. (bar 0 has no previous close)
+    smooth = np.empty(n)
+    _wilder(gain, RSI_PERIOD, 1, smooth)
+    avg_gain = smooth[n - 1]
+    _wilder(loss, RSI_PERIOD, 1, smooth)
+    avg_loss = smooth[n - 1]
+    rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+    # Bollinger Bands over the last BB_PERIOD closes (sample std)
+    bb_middle = _last_mean(close, BB_PERIOD)
+    bb_std = np.nan
+    if n >= BB_PERIOD:
+        ss = 0.0
+        for i in range(n - BB_PERIOD, n):
+            dev = close[i] - bb_middle
+            ss += dev * dev
+        bb_std = math.sqrt(ss / (BB_PERIOD - 1))
+    bb_upper = bb_middle + BB_STD * bb_std
+    bb_lower = bb_middle - BB_STD * bb_std
+
+    smooth_tr = np.empty(n)
+    _wilder(tr, ATR_PERIOD, 1, smooth_tr)
+    atr = smooth_tr[n - 1]
+
+    # ADX: Wilder-smoothed DX, where DX comes from the Wilder-smoothed DM / TR
+    smooth_plus = np.empty(n)
+    smooth_minus = np.empty(n)
+    _wilder(plus_dm, ADX_PERIOD, 1, smooth_plus)
+    _wilder(minus_dm, ADX_PERIOD, 1, smooth_minus)
+    if ADX_PERIOD != ATR_PERIOD:
+        _wilder(tr, ADX_PERIOD, 1, smooth_tr)
+    # DX is 0 where there is no range or no directional movement (and before the
+    # DM/TR seed), so a flat stretch cannot turn the whole ADX into NaN
+    dx = np.zeros(n)
+    for i in range(n):
+        if smooth_tr[i] > 0.0:
+            plus_di = 100.0 * smooth_plus[i] / smooth_tr[i]
+            minus_di = 100.0 * smooth_minus[i] / smooth_tr[i]
+            di_sum = plus_di + minus_di
+            if di_sum > 0.0:
+                dx[i] = 100.0 * abs(plus_di - minus_di) / di_sum
+    _wilder(dx, ADX_PERIOD, ADX_PERIOD, smooth)
+    adx = smooth[n - 1]
+    # Still NaN with fewer than 2 * ADX_PERIOD bars
+    if np.isnan(adx):
+        adx = 0.0
+
+    # Simplified supertrend from the latest bar's midpoint
+    _wilder(tr, SUPERTREND_PERIOD, 1, smooth)
+    st_atr = smooth[n - 1]
+    hl2 = (high[n - 1] + low[n - 1]) / 2.0
+    st_upper = hl2 + SUPERTREND_MULTIPLIER * st_atr
+    st_lower = hl2 - SUPERTREND_MULTIPLIER * st_atr
+    st_bullish = close[n - 1] > st_upper
+    supertrend = st_lower if st_bullish else st_upper
+
+    return (
+        vwap, ema9, ema21, macd, signal, macd - signal, rsi,
+        bb_upper, bb_middle, bb_lower, atr, adx, supertrend, st_bullish
+    )
+
+@njit(COMPUTE_BATCH_SIGNATURE, parallel=True, cache=True)
+def compute_batch(high, low, close, volume, starts):
+    """compute_all for several symbols in parallel, one row of results per symbol
+
+    Row i covers bars starts[i]: of the inputs (shorter histories are left-padded).
+    Columns follow compute_all's tuple, with supertrend_bullish as 1.0 / 0.0.
+    """
+    out = np.empty((close.shape[0], 14))
+    for i in prange(close.shape[0]):
+        s = starts[i]
+        (vwap, ema9, ema21, macd, signal, hist, rsi,
+         bb_upper, bb_middle, bb_lower, atr, adx, supertrend, st_bullish) = compute_all(
+            high[i, s:], low[i, s:], close[i, s:], volume[i, s:]
+        )
+        out[i, 0] = vwap
+        out[i, 1] = ema9
+        out[i, 2] = ema21
+        out[i, 3] = macd
+        out[i, 4] = signal
+        out[i, 5] = hist
+        out[i, 6] = rsi
+        out[i, 7] = bb_upper
+        out[i, 8] = bb_middle
+        out[i, 9] = bb_lower
+        out[i, 10] = atr
+        out[i, 11] = adx
+        out[i, 12] = supertrend
+        out[i, 13] = 1.0 if st_bullish else 0.0
+    return out
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
 from datetime import datetime, timedelta
-import yfinance as yf
+from ..utils.yf_client import fetch_history
 from ..database.connection import get_db, get_redis
 from ..database.models import MarketData
 from pydantic import BaseModel
+import hashlib
 import json
 
 router = APIRouter()
@@ -29,13 +31,65 @@ INDIAN_SYMBOLS = {
     "BANKNIFTY": "^NSEBANK"
 }
 
+# Indian market sessions (local time)
+MARKET_HOURS = {
+    "pre_market": {"start": "09:00", "end": "09:15"},
+    "regular": {"start": "09:15", "end": "15:30"},
+    "post_market": {"start": "15:40", "end": "16:00"}
+}
+
+def _minute_of_day(hhmm: str) -> int:
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+# (session, start minute, end minute) precomputed for integer comparisons
+MARKET_SESSIONS = tuple(
+    (session, _minute_of_day(hours["start"]), _minute_of_day(hours["end"]))
+    for session, hours in MARKET_HOURS.items()
+)
+
+# Yahoo Finance columns -> record fields for historical responses
+HISTORICAL_COLUMNS = {
+    "Open": "open_price",
+    "High": "high_price",
+    "Low": "low_price",
+    "Close": "close_price",
+    "Volume": "volume"
+}
+RECORD_FIELDS = ["symbol", "timestamp", "open_price", "high_price", "low_price", "close_price", "volume"]
+
+# Cache TTLs (seconds) for Yahoo Finance responses
+REALTIME_CACHE_TTL = 30
+HISTORICAL_CACHE_TTL = 300
+
+def market_cache_key(yf_symbol: str, period: str, interval: str) -> str:
+    """Build the Redis key for a symbol/period/interval query"""
+    qualifier = hashlib.sha1(f"{period}:{interval}".encode()).hexdigest()
+    return f"market:{yf_symbol}:{qualifier}"
+
+async def cache_get(key: str):
+    """Read a cached JSON value, treating Redis errors as a cache miss"""
+    try:
+        cached = await get_redis().get(key)
+    except Exception as e:
+        print(f"Redis read failed for {key}: {e}")
+        return None
+    return json.loads(cached) if cached else None
+
+async def cache_set(key: str, value, ttl: int):
+    """Store a JSON value with a TTL, ignoring Redis errors"""
+    try:
+        await get_redis().set(key, json.dumps(value), ex=ttl)
+    except Exception as e:
+        print(f"Redis write failed for {key}: {e}")
+
 @router.get("/symbols")
-async def get_available_symbols():
+async def get_available_symbols() -> Dict[str, Any]:
     """Get list of available symbols"""
     return {"symbols": list(INDIAN_SYMBOLS.keys())}
 
 @router.get("/realtime/{symbol}")
-async def get_realtime_data(symbol: str, db: Session = Depends(get_db)):
+async def get_realtime_data(symbol: str, db: AsyncSession = Depends(get_db)) -> MarketDataResponse:
     """Get real-time market data for a symbol"""
     try:
         # Map symbol to Yahoo Finance symbol
@@ -43,29 +97,34 @@ async def get_realtime_data(symbol: str, db: Session = Depends(get_db)):
         if not yf_symbol:
             raise HTTPException(status_code=404, detail="Symbol not found")
         
-        # Get data from Yahoo Finance
-        ticker = yf.Ticker(yf_symbol)
-        data = ticker.history(period="1d", interval="1m")
-        
-        if data.empty:
-            raise HTTPException(status_code=404, detail="No data available")
-        
-        latest = data.iloc[-1]
-        
-        # Create market data record
-        market_data = MarketData(
-            symbol=symbol.upper(),
-            open_price=float(latest['Open']),
-            high_price=float(latest['High']),
-            low_price=float(latest['Low']),
-            close_price=float(latest['Close']),
-            volume=int(latest['Volume'])
+        # Get latest bar from cache or Yahoo Finance
+        cache_key = market_cache_key(yf_symbol, "1d", "1m")
+        latest = await cache_get(cache_key)
+        
+        if latest is None:
+            data = await fetch_history(yf_symbol, "1d", "1m")
+            
+            if data.empty:
+                raise HTTPException(status_code=404, detail="No data available")
+            
+            row = data.iloc[-1]
+            latest = {
+                "open_price": float(row['Open']),
+                "high_price": float(row['High']),
+                "low_price": float(row['Low']),
+                "close_price": float(row['Close']),
+                "volume": int(row['Volume'])
+            }
+            await cache_set(cache_key, latest, REALTIME_CACHE_TTL)
+        
+        # Save to database in one round-trip, returning the stored row
+        stmt = (
+            insert(MarketData)
+            .values(symbol=symbol.upper(), **latest)
+            .returning(*MarketData.__table__.c)
         )
-        
-        # Save to database
-        db.add(market_data)
-        db.commit()
-        db.refresh(market_data)
+        market_data = (await db.execute(stmt)).one()
+        await db.commit()
         
         return MarketDataResponse.model_validate(market_data)
         
@@ -77,32 +136,35 @@ async def get_historical_data(
     symbol: str, 
     period: str = "1mo",
     interval: str = "1d",
-    db: Session = Depends(get_db)
-):
+    db: AsyncSession = Depends(get_db)
+) -> Dict[str, Any]:
     """Get historical market data"""
     try:
         yf_symbol = INDIAN_SYMBOLS.get(symbol.upper())
         if not yf_symbol:
             raise HTTPException(status_code=404, detail="Symbol not found")
         
-        ticker = yf.Ticker(yf_symbol)
-        data = ticker.history(period=period, interval=interval)
+        cache_key = market_cache_key(yf_symbol, period, interval)
+        records = await cache_get(cache_key)
+        if records is not None:
+            return {"data": records}
+        
+        data = await fetch_history(yf_symbol, period, interval)
         
         if data.empty:
             raise HTTPException(status_code=404, detail="No data available")
         
         # Convert to list of records
-        records = []
-        for timestamp, row in data.iterrows():
-            records.append({
-                "symbol": symbol.upper(),
-                "timestamp": timestamp.isoformat(),
-                "open_price": float(row['Open']),
-                "high_price": float(row['High']),
-                "low_price": float(row['Low']),
-                "close_price": float(row['Close']),
-                "volume": int(row['Volume'])
-            })
+        records = (
+            data[['Open', 'High', 'Low', 'Close', 'Volume']]
+            .astype({'Open': float, 'High': float, 'Low': float, 'Close': float, 'Volume': 'int64'})
+            .rename(columns=HISTORICAL_COLUMNS)
+            .assign(symbol=symbol.upper(), timestamp=[ts.isoformat() for ts in data.index])
+            [RECORD_FIELDS]
+            .to_dict(orient="records")
+        )
+        
+        await cache_set(cache_key, records, HISTORICAL_CACHE_TTL)
         
         return {"data": records}
         
@@ -110,29 +172,23 @@ async def get_historical_data(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/market-status")
-async def get_market_status():
+async def get_market_status() -> Dict[str, Any]:
     """Get Indian market status"""
     try:
         # Check if Indian markets are open (simplified)
         now = datetime.now()
-        market_hours = {
-            "pre_market": {"start": "09:00", "end": "09:15"},
-            "regular": {"start": "09:15", "end": "15:30"},
-            "post_market": {"start": "15:40", "end": "16:00"}
-        }
-        
-        current_time = now.strftime("%H:%M")
+        minute_of_day = now.hour * 60 + now.minute
         status = "closed"
         
-        for session, hours in market_hours.items():
-            if hours["start"] <= current_time <= hours["end"]:
+        for session, start, end in MARKET_SESSIONS:
+            if start <= minute_of_day <= end:
                 status = session
                 break
         
         return {
             "status": status,
             "timestamp": now.isoformat(),
-            "market_hours": market_hours
+            "market_hours": MARKET_HOURS
         }
         
     except Exception as e:
@@ -1,23 +1,40 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Any, Optional, Set, Tuple
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error
-import yfinance as yf
 import joblib
 import os
-from ..database.connection import get_db
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from cachetools import LRUCache
+from ..utils.frame_codec import dumps_frame, loads_frame
+from ..utils.yf_client import fetch_history
+from ..config import settings
+from ..database.connection import get_db, get_redis, get_redis_binary
 from ..database.models import MLPredictions
+from ..database.bulk import prediction_writer
 from pydantic import BaseModel
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import warnings
 warnings.filterwarnings('ignore')
 
 router = APIRouter()
 
+# Lags (in rows) used for the close/volume lag features
+LAGS = [1, 2, 3, 5]
+
+# TTL (seconds) for prepared feature frames shared through Redis
+FEATURE_CACHE_TTL = 30
+
 class PredictionResponse(BaseModel):
     symbol: str
     model_type: str
@@ -29,63 +46,146 @@ class PredictionResponse(BaseModel):
     recommendation: str
     timestamp: datetime
 
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing simple moving average, NaN until the window is full"""
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = np.convolve(values, np.ones(window) / window, 'valid')
+    return out
+
+def _rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing sample standard deviation, NaN until the window is full"""
+    out = np.full(len(values), np.nan)
+    if len(values) >= window:
+        out[window - 1:] = np.lib.stride_tricks.sliding_window_view(values, window).std(axis=1, ddof=1)
+    return out
+
+def _shift(values: np.ndarray, periods: int) -> np.ndarray:
+    """Shift values forward by `periods`, padding the front with NaN"""
+    out = np.full(len(values), np.nan)
+    out[periods:] = values[:len(values) - periods]
+    return out
+
+def _lag_matrix(values: np.ndarray, lags: List[int]) -> np.ndarray:
+    """All lagged copies of `values` at once; column i is `values` shifted by lags[i]"""
+    max_lag = max(lags)
+    padded = np.concatenate([np.full(max_lag, np.nan), values])
+    # Row t of the reversed window view holds values[t], values[t-1], ..., values[t-max_lag]
+    windows = np.lib.stride_tricks.sliding_window_view(padded, max_lag + 1)[:, ::-1]
+    return windows[:, lags]
+
+def _pct_change(values: np.ndarray, periods: int) -> np.ndarray:
+    """Percentage change over `periods` rows"""
+    previous = _shift(values, periods)
+    return values / previous - 1
+
 class MLModelManager:
     def __init__(self):
-        self.models = {}
-        self.scalers = {}
+        # (file mtime, model, scaler) per "<symbol>_rf" key; bounded to cap memory
+        self.models = LRUCache(maxsize=16)
+        self.feature_cache = LRUCache(maxsize=128)
         self.model_dir = "backend/app/ml_models"
         os.makedirs(self.model_dir, exist_ok=True)
     
     def prepare_features(self, data: pd.DataFrame) -> pd.DataFrame:
         """Prepare features for ML model"""
-        features = pd.DataFrame()
-        
-        # Price features
-        features['close'] = data['Close']
-        features['open'] = data['Open']
-        features['high'] = data['High']
-        features['low'] = data['Low']
-        features['volume'] = data['Volume']
+        close = data['Close'].to_numpy(dtype=np.float64)
+        volume = data['Volume'].to_numpy()
         
         # Technical indicators
-        features['sma_5'] = data['Close'].rolling(window=5).mean()
-        features['sma_10'] = data['Close'].rolling(window=10).mean()
-        features['sma_20'] = data['Close'].rolling(window=20).mean()
-        
-        # Price changes
-        features['price_change'] = data['Close'].pct_change()
-        features['price_change_5'] = data['Close'].pct_change(periods=5)
-        
-        # Volatility
-        features['volatility'] = data['Close'].rolling(window=10).std()
+        sma_5 = _rolling_mean(close, 5)
+        sma_10 = _rolling_mean(close, 10)
+        sma_20 = _rolling_mean(close, 20)
         
         # RSI
-        delta = data['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        features['rsi'] = 100 - (100 / (1 + rs))
+        delta = np.diff(close, prepend=np.nan)
+        gain = _rolling_mean(np.where(delta > 0, delta, 0.0), 14)
+        loss = _rolling_mean(np.where(delta < 0, -delta, 0.0), 14)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + gain / loss))
         
         # MACD
-        ema12 = data['Close'].ewm(span=12).mean()
-        ema26 = data['Close'].ewm(span=26).mean()
-        features['macd'] = ema12 - ema26
-        features['macd_signal'] = features['macd'].ewm(span=9).mean()
-        
-        # Bollinger Bands
-        bb_middle = data['Close'].rolling(window=20).mean()
-        bb_std = data['Close'].rolling(window=20).std()
-        features['bb_upper'] = bb_middle + (bb_std * 2)
-        features['bb_lower'] = bb_middle - (bb_std * 2)
-        features['bb_position'] = (data['Close'] - bb_lower) / (bb_upper - bb_lower)
+        close_series = pd.Series(close)
+        macd = (close_series.ewm(span=12).mean() - close_series.ewm(span=26).mean()).to_numpy()
+        macd_signal = pd.Series(macd).ewm(span=9).mean().to_numpy()
+        
+        # Bollinger Bands (reusing the 20-day SMA)
+        bb_std = _rolling_std(close, 20)
+        bb_upper = sma_20 + (bb_std * 2)
+        bb_lower = sma_20 - (bb_std * 2)
+        
+        # Position within the bands; NaN when the bands collapse (flat prices)
+        bb_width = bb_upper - bb_lower
+        bb_position = np.divide(
+            close - bb_lower, bb_width,
+            out=np.full(len(close), np.nan), where=bb_width != 0
+        )
+        
+        columns = {
+            # Price features
+            'close': close,
+            'open': data['Open'].to_numpy(),
+            'high': data['High'].to_numpy(),
+            'low': data['Low'].to_numpy(),
+            'volume': volume,
+            'sma_5': sma_5,
+            'sma_10': sma_10,
+            'sma_20': sma_20,
+            # Price changes
+            'price_change': _pct_change(close, 1),
+            'price_change_5': _pct_change(close, 5),
+            # Volatility
+            'volatility': _rolling_std(close, 10),
+            'rsi': rsi,
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'bb_upper': bb_upper,
+            'bb_lower': bb_lower,
+            'bb_position': bb_position
+        }
         
         # Lag features
-        for lag in [1, 2, 3, 5]:
-            features[f'close_lag_{lag}'] = data['Close'].shift(lag)
-            features[f'volume_lag_{lag}'] = data['Volume'].shift(lag)
+        close_lags = _lag_matrix(close, LAGS)
+        volume_lags = _lag_matrix(volume, LAGS)
+        for i, lag in enumerate(LAGS):
+            columns[f'close_lag_{lag}'] = close_lags[:, i]
+            columns[f'volume_lag_{lag}'] = volume_lags[:, i]
+        
+        # Build the frame in one go instead of assigning column by column
+        features = pd.DataFrame(columns, index=data.index)
         
         return features.dropna()
     
+    def features_cache_key(self, symbol: str, data: pd.DataFrame) -> str:
+        """Key prepared features by symbol and a digest of the latest bar"""
+        fingerprint = f"{data.index[-1].isoformat()}:{len(data)}:{data['Close'].iloc[-1]!r}"
+        digest = hashlib.blake2b(fingerprint.encode(), digest_size=16).hexdigest()
+        return f"features:{symbol}:{digest}"
+    
+    async def get_cached_features(self, key: str) -> Optional[pd.DataFrame]:
+        """Prepared features from the in-process LRU, then Redis; None on a miss"""
+        features = self.feature_cache.get(key)
+        if features is not None:
+            return features
+        
+        try:
+            cached = await get_redis_binary().get(key)
+            if cached:
+                features = loads_frame(cached)
+                self.feature_cache[key] = features
+        except Exception as e:
+            print(f"Feature cache read failed for {key}: {e}")
+        
+        return features
+    
+    async def cache_features(self, key: str, features: pd.DataFrame):
+        """Store prepared features in the in-process LRU and Redis"""
+        self.feature_cache[key] = features
+        try:
+            await get_redis_binary().set(key, dumps_frame(features), ex=FEATURE_CACHE_TTL)
+        except Exception as e:
+            print(f"Feature cache write failed for {key}: {e}")
+    
     def create_sequences(self, data: np.ndarray, seq_length: int = 10):
         """Create sequences for time series prediction"""
         X, y = [], []
@@ -141,8 +241,7 @@ class MLModelManager:
             joblib.dump(model, model_path)
             joblib.dump(scaler, scaler_path)
             
-            self.models[f"{symbol}_rf"] = model
-            self.scalers[f"{symbol}_rf"] = scaler
+            self.models[f"{symbol}_rf"] = (os.path.getmtime(model_path), model, scaler)
             
             return {
                 "model_type": "random_forest",
@@ -155,35 +254,54 @@ class MLModelManager:
         except Exception as e:
             raise Exception(f"Error training Random Forest model: {str(e)}")
     
-    def predict_with_model(self, symbol: str, data: pd.DataFrame, model_type: str = "random_forest") -> Dict[str, Any]:
+    def load_model(self, symbol: str):
+        """Get model and scaler for a symbol, reloading when the files on disk change"""
+        key = f"{symbol}_rf"
+        model_path = f"{self.model_dir}/{symbol}_rf_model.joblib"
+        scaler_path = f"{self.model_dir}/{symbol}_rf_scaler.joblib"
+        
+        # Comparing mtimes picks up models retrained by any worker process
+        mtime = os.path.getmtime(model_path)
+        cached = self.models.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1], cached[2]
+        
+        # Memory-map the arrays so processes share the trees via the page cache
+        model = joblib.load(model_path, mmap_mode='r')
+        scaler = joblib.load(scaler_path, mmap_mode='r')
+        self.models[key] = (mtime, model, scaler)
+        return model, scaler
+    
+    def predict_with_model(
+        self,
+        symbol: str,
+        data: pd.DataFrame,
+        model_type: str = "random_forest",
+        features: Optional[pd.DataFrame] = None
+    ) -> Dict[str, Any]:
         """Make prediction using trained model"""
         try:
-            model_key = f"{symbol}_{model_type.replace('_', '')}"
+            model_path = f"{self.model_dir}/{symbol}_rf_model.joblib"
             
-            # Load model if not in memory
-            if model_key not in self.models:
-                model_path = f"{self.model_dir}/{symbol}_rf_model.joblib"
-                scaler_path = f"{self.model_dir}/{symbol}_rf_scaler.joblib"
-                
-                if not os.path.exists(model_path):
-                    # Train model if it doesn't exist
-                    training_result = self.train_random_forest_model(symbol, data)
-                else:
-                    self.models[model_key] = joblib.load(model_path)
-                    self.scalers[model_key] = joblib.load(scaler_path)
+            if not os.path.exists(model_path):
+                # Train model if it doesn't exist
+                self.train_random_forest_model(symbol, data)
             
-            # Prepare features
-            features = self.prepare_features(data)
+            model, scaler = self.load_model(symbol)
+            
+            # Prepare features unless already provided
+            if features is None:
+                features = self.prepare_features(data)
             
             if len(features) == 0:
                 raise ValueError("No features available for prediction")
             
-            # Get last row for prediction
-            X_pred = features.iloc[-1:].drop(['close'], axis=1, errors='ignore')
-            X_pred_scaled = self.scalers[model_key].transform(X_pred)
+            # Get last row for prediction, with the same columns the scaler was fitted on
+            X_pred = features.iloc[-1:]
+            X_pred_scaled = scaler.transform(X_pred)
             
             # Make prediction
-            prediction = self.models[model_key].predict(X_pred_scaled)[0]
+            prediction = model.predict(X_pred_scaled)[0]
             
             current_price = data['Close'].iloc[-1]
             change_percentage = ((prediction - current_price) / current_price) * 100
@@ -205,9 +323,61 @@ class MLModelManager:
 
 ml_manager = MLModelManager()
 
-@router.post("/train/{symbol}")
-async def train_model(symbol: str, model_type: str = "random_forest", db: Session = Depends(get_db)):
-    """Train ML model for a symbol"""
+# Worker processes for CPU-bound training and inference. "spawn" avoids forking
+# the event loop's threads; each worker builds its own ml_manager on import.
+process_pool = ProcessPoolExecutor(
+    max_workers=settings.ml_pool_workers,
+    mp_context=multiprocessing.get_context("spawn")
+)
+
+# Training job status lives in Redis so any API worker can answer for any job.
+# A job whose owning process exits before it finishes stays "queued" until the TTL.
+TRAINING_JOB_TTL = 24 * 3600
+
+# Outcome trackers for in-flight training jobs (kept referenced until done)
+_training_tasks: Set[asyncio.Task] = set()
+
+def _training_job_key(job_id: str) -> str:
+    return f"ml:train:{job_id}"
+
+async def _save_training_job(job_id: str, job: Dict[str, Any]):
+    await get_redis().set(_training_job_key(job_id), json.dumps(job, default=float), ex=TRAINING_JOB_TTL)
+
+async def _track_training_job(job_id: str, job: Dict[str, Any], future):
+    """Record a pool training job's result (or error) once it finishes"""
+    try:
+        job["training_result"] = await asyncio.wrap_future(future)
+        job["status"] = "completed"
+    except Exception as e:
+        job["status"] = "failed"
+        job["error"] = str(e)
+    
+    try:
+        await _save_training_job(job_id, job)
+    except Exception as e:
+        print(f"Error saving training job {job_id}: {e}")
+
+def _train_in_worker(symbol: str, data: pd.DataFrame) -> Dict[str, Any]:
+    return ml_manager.train_random_forest_model(symbol, data)
+
+def _predict_in_worker(
+    symbol: str,
+    data: pd.DataFrame,
+    model_type: str,
+    features: Optional[pd.DataFrame]
+) -> Tuple[Dict[str, Any], Optional[pd.DataFrame]]:
+    """Predict in a pool worker, preparing the features here on a cache miss
+
+    Returns the prediction and the newly prepared features (None if they were passed in).
+    """
+    prepared = None
+    if features is None:
+        features = prepared = ml_manager.prepare_features(data)
+    return ml_manager.predict_with_model(symbol, data, model_type, features), prepared
+
+@router.post("/train/{symbol}", status_code=202)
+async def train_model(symbol: str, model_type: str = "random_forest") -> Dict[str, Any]:
+    """Queue ML model training for a symbol"""
     try:
         # Map symbol to Yahoo Finance
         symbol_map = {"NIFTY": "^NSEI", "SENSEX": "^BSESN", "BANKNIFTY": "^NSEBANK"}
@@ -216,36 +386,60 @@ async def train_model(symbol: str, model_type: str = "random_forest", db: Sessio
         if not yf_symbol:
             raise HTTPException(status_code=404, detail="Symbol not found")
         
+        if model_type != "random_forest":
+            raise HTTPException(status_code=400, detail="Unsupported model type")
+        
         # Get historical data
-        ticker = yf.Ticker(yf_symbol)
-        data = ticker.history(period="2y", interval="1d")
+        data = await fetch_history(yf_symbol, "2y", "1d")
         
         if len(data) < 100:
             raise HTTPException(status_code=400, detail="Insufficient data for training")
         
-        # Train model
-        if model_type == "random_forest":
-            result = ml_manager.train_random_forest_model(symbol.upper(), data)
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported model type")
+        # Train model in the process pool and return immediately
+        job_id = uuid.uuid4().hex
+        job = {
+            "symbol": symbol.upper(),
+            "model_type": model_type,
+            "status": "queued",
+            "submitted_at": datetime.now().isoformat()
+        }
+        await _save_training_job(job_id, job)
+        
+        future = process_pool.submit(_train_in_worker, symbol.upper(), data)
+        task = asyncio.create_task(_track_training_job(job_id, job, future))
+        _training_tasks.add(task)
+        task.add_done_callback(_training_tasks.discard)
         
         return {
+            "job_id": job_id,
             "symbol": symbol.upper(),
             "model_type": model_type,
-            "training_result": result,
+            "status": "queued",
             "timestamp": datetime.now().isoformat()
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/train/jobs/{job_id}")
+async def get_training_job(job_id: str) -> Dict[str, Any]:
+    """Get status and result of a training job"""
+    try:
+        job = await get_redis().get(_training_job_key(job_id))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    
+    return {"job_id": job_id, **json.loads(job)}
+
 @router.get("/predict/{symbol}")
 async def predict_price(
     symbol: str, 
     horizon: str = "1d",
-    model_type: str = "random_forest",
-    db: Session = Depends(get_db)
-):
+    model_type: str = "random_forest"
+) -> Dict[str, Any]:
     """Get price prediction for a symbol"""
     try:
         # Map symbol to Yahoo Finance
@@ -256,14 +450,19 @@ async def predict_price(
             raise HTTPException(status_code=404, detail="Symbol not found")
         
         # Get historical data
-        ticker = yf.Ticker(yf_symbol)
-        data = ticker.history(period="6mo", interval="1d")
+        data = await fetch_history(yf_symbol, "6mo", "1d")
         
         if data.empty:
             raise HTTPException(status_code=404, detail="No data available")
         
-        # Make prediction
-        prediction_result = ml_manager.predict_with_model(symbol.upper(), data, model_type)
+        # Make prediction; on a feature cache miss the worker prepares them
+        features_key = ml_manager.features_cache_key(symbol.upper(), data)
+        features = await ml_manager.get_cached_features(features_key)
+        prediction_result, prepared = await asyncio.get_running_loop().run_in_executor(
+            process_pool, _predict_in_worker, symbol.upper(), data, model_type, features
+        )
+        if prepared is not None:
+            await ml_manager.cache_features(features_key, prepared)
         
         # Generate recommendation
         change_pct = prediction_result['change_percentage']
@@ -280,17 +479,15 @@ async def predict_price(
         else:
             recommendation = "Hold"
         
-        # Save prediction to database
-        ml_prediction = MLPredictions(
-            symbol=symbol.upper(),
-            model_type=model_type,
-            prediction_horizon=horizon,
-            predicted_price=prediction_result['predicted_price'],
-            confidence_score=confidence
-        )
-        
-        db.add(ml_prediction)
-        db.commit()
+        # Queue prediction for the batched COPY writer
+        prediction_writer.put((
+            symbol.upper(),
+            model_type,
+            horizon,
+            float(prediction_result['predicted_price']),
+            float(confidence),
+            datetime.now(timezone.utc)
+        ))
         
         return {
             "symbol": symbol.upper(),
@@ -308,17 +505,20 @@ async def predict_price(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/predictions/{symbol}/history")
-async def get_prediction_history(symbol: str, days: int = 30, db: Session = Depends(get_db)):
+async def get_prediction_history(symbol: str, days: int = 30, db: AsyncSession = Depends(get_db)) -> Dict[str, Any]:
     """Get historical predictions and their accuracy"""
     try:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        predictions = db.query(MLPredictions).filter(
-            MLPredictions.symbol == symbol.upper(),
-            MLPredictions.timestamp >= start_date,
-            MLPredictions.timestamp <= end_date
-        ).all()
+        result = await db.execute(
+            select(MLPredictions).where(
+                MLPredictions.symbol == symbol.upper(),
+                MLPredictions.timestamp >= start_date,
+                MLPredictions.timestamp <= end_date
+            )
+        )
+        predictions = result.scalars().all()
         
         if not predictions:
             return {"message": "No prediction history found", "data": []}
@@ -346,7 +546,7 @@ async def get_prediction_history(symbol: str, days: int = 30, db: Session = Depe
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/models/status")
-async def get_model_status():
+async def get_model_status() -> Dict[str, Any]:
     """Get status of all trained models"""
     try:
         model_files = []
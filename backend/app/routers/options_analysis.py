@@ -1,18 +1,32 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any, Optional
-import pandas as pd
 import numpy as np
-from scipy.stats import norm
-import yfinance as yf
+from ..utils.yf_cache import cached_history
+from ..quant.bs_kernel import chain_greeks, price_option
 from ..database.connection import get_db
 from ..database.models import OptionsData, TradingRecommendations
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-import math
+import time
+from functools import lru_cache
 
 router = APIRouter()
 
+# Redis TTLs (seconds) for cached Yahoo Finance history
+INTRADAY_HISTORY_TTL = 60
+DAILY_HISTORY_TTL = 300
+
+# symbol -> (minute bucket, annualized volatility)
+_iv_cache: Dict[str, Any] = {}
+
+# Spot is rounded to this step before pricing so nearby ticks hit the chain cache
+CHAIN_PRICE_STEP = 10
+
+# Strike moneyness levels as fractions of spot
+_STRIKE_PCTS = np.array([-10, -7.5, -5, -2.5, 0, 2.5, 5, 7.5, 10, 15, 20]) / 100.0
+
 class OptionsRecommendation(BaseModel):
     symbol: str
     strategy: str
@@ -28,154 +42,109 @@ class OptionsRecommendation(BaseModel):
     reasoning: str
     timestamp: datetime
 
-class BlackScholesCalculator:
-    @staticmethod
-    def calculate_option_price(S, K, T, r, sigma, option_type='call'):
-        """Calculate option price using Black-Scholes formula"""
-        try:
-            d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
-            d2 = d1 - sigma * np.sqrt(T)
-            
-            if option_type.lower() == 'call':
-                price = (S * norm.cdf(d1) - K * np.exp(-r * T) * norm.cdf(d2))
-            else:  # put
-                price = (K * np.exp(-r * T) * norm.cdf(-d2) - S * norm.cdf(-d1))
-            
-            return max(0, price)
-        except:
-            return 0
-    
-    @staticmethod
-    def calculate_greeks(S, K, T, r, sigma, option_type='call'):
-        """Calculate option Greeks"""
-        try:
-            d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
-            d2 = d1 - sigma * np.sqrt(T)
-            
-            # Delta
-            if option_type.lower() == 'call':
-                delta = norm.cdf(d1)
-            else:
-                delta = -norm.cdf(-d1)
-            
-            # Gamma
-            gamma = norm.pdf(d1) / (S * sigma * np.sqrt(T))
-            
-            # Theta
-            if option_type.lower() == 'call':
-                theta = (-(S * norm.pdf(d1) * sigma) / (2 * np.sqrt(T)) 
-                        - r * K * np.exp(-r * T) * norm.cdf(d2)) / 365
-            else:
-                theta = (-(S * norm.pdf(d1) * sigma) / (2 * np.sqrt(T)) 
-                        + r * K * np.exp(-r * T) * norm.cdf(-d2)) / 365
-            
-            # Vega
-            vega = S * norm.pdf(d1) * np.sqrt(T) / 100
-            
-            return {
-                'delta': delta,
-                'gamma': gamma,
-                'theta': theta,
-                'vega': vega
-            }
-        except:
-            return {'delta': 0, 'gamma': 0, 'theta': 0, 'vega': 0}
+def annualized_volatility(close: np.ndarray) -> float:
+    """Annualized historical volatility of daily closes"""
+    returns = np.diff(close) / close[:-1]
+    return float(returns.std(ddof=1) * np.sqrt(252))
 
-def get_implied_volatility(symbol: str) -> float:
+async def get_implied_volatility(symbol: str) -> float:
     """Calculate implied volatility from historical data"""
+    # Memoized per symbol for the current minute
+    minute_bucket = int(time.time() // 60)
+    cached = _iv_cache.get(symbol)
+    if cached and cached[0] == minute_bucket:
+        return cached[1]
+    
     try:
         symbol_map = {"NIFTY": "^NSEI", "SENSEX": "^BSESN", "BANKNIFTY": "^NSEBANK"}
         yf_symbol = symbol_map.get(symbol.upper(), symbol)
         
-        ticker = yf.Ticker(yf_symbol)
-        data = ticker.history(period="3mo", interval="1d")
+        data = await cached_history(yf_symbol, "3mo", "1d", ttl=DAILY_HISTORY_TTL)
         
         if data.empty:
             return 0.25  # Default volatility
         
-        # Calculate historical volatility
-        returns = data['Close'].pct_change().dropna()
-        volatility = returns.std() * np.sqrt(252)  # Annualized volatility
+        volatility = annualized_volatility(data['Close'].to_numpy(dtype=float))
         
+        _iv_cache[symbol] = (minute_bucket, volatility)
         return volatility
     except:
         return 0.25
 
-def generate_strike_prices(current_price: float, option_type: str) -> List[float]:
+def generate_strike_prices(current_price: float, option_type: str) -> np.ndarray:
     """Generate relevant strike prices around current price"""
-    strikes = []
+    # Unique sorted strikes at each moneyness level, rounded to the nearest 50
+    return np.unique(np.round(current_price * (1 + _STRIKE_PCTS) / 50) * 50).astype(np.int64)
+
+@lru_cache(maxsize=1024)
+def price_options_chain(current_price: float, expiry_days: int, implied_vol: float) -> Dict[str, Any]:
+    """Price the strike ladder; pure in its inputs, so results are memoized (treat as read-only)"""
+    # Risk-free rate (approximate)
+    risk_free_rate = 0.06  # 6% for Indian markets
     
-    # Generate strikes at different moneyness levels
-    percentages = [-10, -7.5, -5, -2.5, 0, 2.5, 5, 7.5, 10, 15, 20]
+    # Time to expiry
+    T = expiry_days / 365.0
     
-    for pct in percentages:
-        strike = current_price * (1 + pct/100)
-        strikes.append(round(strike/50) * 50)  # Round to nearest 50
+    # Generate strike prices
+    strikes = generate_strike_prices(current_price, 'both')
     
-    return sorted(list(set(strikes)))
+    # Price every strike with one call into the compiled kernel
+    strikes_array = strikes.astype(float)
+    chain = chain_greeks(current_price, strikes_array, T, risk_free_rate, implied_vol)
+    
+    # Strikes are sorted, so strategies can index around the at-the-money row
+    atm_index = int(np.argmin(np.abs(strikes_array - current_price)))
+    
+    options_data = []
+    for i, strike in enumerate(strikes.tolist()):
+        options_data.append({
+            'strike_price': strike,
+            'call': {
+                'premium': round(float(chain['call_premium'][i]), 2),
+                'delta': round(float(chain['call_delta'][i]), 3),
+                'gamma': round(float(chain['gamma'][i]), 4),
+                'theta': round(float(chain['call_theta'][i]), 3),
+                'vega': round(float(chain['vega'][i]), 3),
+                'moneyness': 'ITM' if strike < current_price else 'OTM' if strike > current_price else 'ATM'
+            },
+            'put': {
+                'premium': round(float(chain['put_premium'][i]), 2),
+                'delta': round(float(chain['put_delta'][i]), 3),
+                'gamma': round(float(chain['gamma'][i]), 4),
+                'theta': round(float(chain['put_theta'][i]), 3),
+                'vega': round(float(chain['vega'][i]), 3),
+                'moneyness': 'ITM' if strike > current_price else 'OTM' if strike < current_price else 'ATM'
+            }
+        })
+    
+    return {
+        'current_price': current_price,
+        'implied_volatility': implied_vol,
+        'expiry_days': expiry_days,
+        'risk_free_rate': risk_free_rate,
+        'atm_index': atm_index,
+        'options_chain': options_data
+    }
 
-def analyze_options_chain(symbol: str, current_price: float, expiry_days: int = 30) -> Dict[str, Any]:
+async def analyze_options_chain(
+    symbol: str,
+    current_price: float,
+    expiry_days: int = 30,
+    sigma: Optional[float] = None
+) -> Dict[str, Any]:
     """Analyze options chain and generate data"""
     try:
-        # Risk-free rate (approximate)
-        risk_free_rate = 0.06  # 6% for Indian markets
-        
-        # Time to expiry
-        T = expiry_days / 365.0
-        
-        # Implied volatility
-        implied_vol = get_implied_volatility(symbol)
-        
-        # Generate strike prices
-        strikes = generate_strike_prices(current_price, 'both')
-        
-        options_data = []
-        bs_calculator = BlackScholesCalculator()
-        
-        for strike in strikes:
-            # Calculate call option
-            call_price = bs_calculator.calculate_option_price(
-                current_price, strike, T, risk_free_rate, implied_vol, 'call'
-            )
-            call_greeks = bs_calculator.calculate_greeks(
-                current_price, strike, T, risk_free_rate, implied_vol, 'call'
-            )
-            
-            # Calculate put option
-            put_price = bs_calculator.calculate_option_price(
-                current_price, strike, T, risk_free_rate, implied_vol, 'put'
-            )
-            put_greeks = bs_calculator.calculate_greeks(
-                current_price, strike, T, risk_free_rate, implied_vol, 'put'
-            )
-            
-            options_data.append({
-                'strike_price': strike,
-                'call': {
-                    'premium': round(call_price, 2),
-                    'delta': round(call_greeks['delta'], 3),
-                    'gamma': round(call_greeks['gamma'], 4),
-                    'theta': round(call_greeks['theta'], 3),
-                    'vega': round(call_greeks['vega'], 3),
-                    'moneyness': 'ITM' if strike < current_price else 'OTM' if strike > current_price else 'ATM'
-                },
-                'put': {
-                    'premium': round(put_price, 2),
-                    'delta': round(put_greeks['delta'], 3),
-                    'gamma': round(put_greeks['gamma'], 4),
-                    'theta': round(put_greeks['theta'], 3),
-                    'vega': round(put_greeks['vega'], 3),
-                    'moneyness': 'ITM' if strike > current_price else 'OTM' if strike < current_price else 'ATM'
-                }
-            })
+        # Implied volatility (callers that already hold the history pass it in)
+        implied_vol = sigma if sigma is not None else await get_implied_volatility(symbol)
+        
+        # Quantize the inputs so repeated requests within a few ticks share one priced chain
+        chain = price_options_chain(
+            float(round(current_price / CHAIN_PRICE_STEP) * CHAIN_PRICE_STEP),
+            expiry_days,
+            round(float(implied_vol), 4)
+        )
         
-        return {
-            'current_price': current_price,
-            'implied_volatility': round(implied_vol, 4),
-            'expiry_days': expiry_days,
-            'risk_free_rate': risk_free_rate,
-            'options_chain': options_data
-        }
+        return {**chain, 'current_price': current_price}
         
     except Exception as e:
         raise Exception(f"Error analyzing options chain: {str(e)}")
@@ -183,13 +152,21 @@ def analyze_options_chain(symbol: str, current_price: float, expiry_days: int =
 def generate_options_strategies(symbol: str, market_outlook: str, options_chain: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Generate options trading strategies based on market outlook"""
     strategies = []
-    current_price = options_chain['current_price']
     
     try:
+        chain = options_chain['options_chain']
+        if not chain:
+            return strategies
+        
+        # Neighbouring strikes around the at-the-money row, clamped to the chain
+        atm_index = options_chain['atm_index']
+        atm_option = chain[atm_index]
+        itm_index = max(0, atm_index - 1)
+        otm_index = min(len(chain) - 1, atm_index + 1)
+        
         if market_outlook.lower() == 'bullish':
             # Long Call strategy
-            atm_call = next((opt for opt in options_chain['options_chain'] 
-                           if opt['call']['moneyness'] == 'ATM'), None)
+            atm_call = atm_option
             if atm_call:
                 strategies.append({
                     'strategy': 'Long Call',
@@ -207,12 +184,11 @@ def generate_options_strategies(symbol: str, market_outlook: str, options_chain:
                 })
             
             # Bull Call Spread
-            itm_call = next((opt for opt in options_chain['options_chain'] 
-                           if opt['strike_price'] < current_price and opt['call']['premium'] > 0), None)
-            otm_call = next((opt for opt in options_chain['options_chain'] 
-                           if opt['strike_price'] > current_price and opt['call']['premium'] > 0), None)
+            itm_call = chain[itm_index]
+            otm_call = chain[otm_index]
             
-            if itm_call and otm_call:
+            if (itm_index < otm_index
+                    and itm_call['call']['premium'] > 0 and otm_call['call']['premium'] > 0):
                 net_premium = itm_call['call']['premium'] - otm_call['call']['premium']
                 strategies.append({
                     'strategy': 'Bull Call Spread',
@@ -239,8 +215,7 @@ def generate_options_strategies(symbol: str, market_outlook: str, options_chain:
         
         elif market_outlook.lower() == 'bearish':
             # Long Put strategy
-            atm_put = next((opt for opt in options_chain['options_chain'] 
-                          if opt['put']['moneyness'] == 'ATM'), None)
+            atm_put = atm_option
             if atm_put:
                 strategies.append({
                     'strategy': 'Long Put',
@@ -259,8 +234,6 @@ def generate_options_strategies(symbol: str, market_outlook: str, options_chain:
         
         elif market_outlook.lower() == 'neutral':
             # Short Straddle
-            atm_option = next((opt for opt in options_chain['options_chain']
-                             if abs(opt['strike_price'] - current_price) < 50), None)
             if atm_option:
                 total_premium = atm_option['call']['premium'] + atm_option['put']['premium']
                 strategies.append({
@@ -293,27 +266,30 @@ def generate_options_strategies(symbol: str, market_outlook: str, options_chain:
         print(f"Error generating strategies: {e}")
         return []
 
+async def fetch_options_chain(symbol: str, expiry_days: int) -> Dict[str, Any]:
+    """Price the options chain around the latest intraday price"""
+    # Get current price
+    symbol_map = {"NIFTY": "^NSEI", "SENSEX": "^BSESN", "BANKNIFTY": "^NSEBANK"}
+    yf_symbol = symbol_map.get(symbol.upper())
+    
+    if not yf_symbol:
+        raise HTTPException(status_code=404, detail="Symbol not found")
+    
+    data = await cached_history(yf_symbol, "1d", "1m", ttl=INTRADAY_HISTORY_TTL)
+    
+    if data.empty:
+        raise HTTPException(status_code=404, detail="No data available")
+    
+    current_price = float(data['Close'].to_numpy()[-1])
+    
+    # Analyze options chain
+    return await analyze_options_chain(symbol.upper(), current_price, expiry_days)
+
 @router.get("/chain/{symbol}")
-async def get_options_chain(symbol: str, expiry_days: int = 30):
+async def get_options_chain(symbol: str, expiry_days: int = 30) -> Dict[str, Any]:
     """Get options chain for a symbol"""
     try:
-        # Get current price
-        symbol_map = {"NIFTY": "^NSEI", "SENSEX": "^BSESN", "BANKNIFTY": "^NSEBANK"}
-        yf_symbol = symbol_map.get(symbol.upper())
-        
-        if not yf_symbol:
-            raise HTTPException(status_code=404, detail="Symbol not found")
-        
-        ticker = yf.Ticker(yf_symbol)
-        data = ticker.history(period="1d", interval="1m")
-        
-        if data.empty:
-            raise HTTPException(status_code=404, detail="No data available")
-        
-        current_price = data['Close'].iloc[-1]
-        
-        # Analyze options chain
-        options_analysis = analyze_options_chain(symbol.upper(), current_price, expiry_days)
+        options_analysis = await fetch_options_chain(symbol, expiry_days)
         
         return {
             "symbol": symbol.upper(),
@@ -329,12 +305,11 @@ async def get_options_strategies(
     symbol: str, 
     market_outlook: str = "neutral",
     expiry_days: int = 30
-):
+) -> Dict[str, Any]:
     """Get options trading strategies based on market outlook"""
     try:
         # Get options chain
-        chain_response = await get_options_chain(symbol, expiry_days)
-        options_chain = chain_response['analysis']
+        options_chain = await fetch_options_chain(symbol, expiry_days)
         
         # Generate strategies
         strategies = generate_options_strategies(symbol.upper(), market_outlook, options_chain)
@@ -352,7 +327,7 @@ async def get_options_strategies(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/recommendations/{symbol}")
-async def get_options_recommendations(symbol: str, db: Session = Depends(get_db)):
+async def get_options_recommendations(symbol: str, db: AsyncSession = Depends(get_db)) -> Dict[str, Any]:
     """Get AI-powered options trading recommendations"""
     try:
         # Get current market data
@@ -362,18 +337,20 @@ async def get_options_recommendations(symbol: str, db: Session = Depends(get_db)
         if not yf_symbol:
             raise HTTPException(status_code=404, detail="Symbol not found")
         
-        ticker = yf.Ticker(yf_symbol)
-        data = ticker.history(period="1mo", interval="1d")
+        # One 3-month fetch serves the trend analysis, current price and volatility
+        data = await cached_history(yf_symbol, "3mo", "1d", ttl=DAILY_HISTORY_TTL)
         
         if data.empty:
             raise HTTPException(status_code=404, detail="No data available")
         
-        current_price = data['Close'].iloc[-1]
+        close = data['Close'].to_numpy(dtype=float)
+        current_price = float(close[-1])
+        sigma = annualized_volatility(close)
         
         # Simple trend analysis
-        sma_5 = data['Close'].tail(5).mean()
-        sma_20 = data['Close'].tail(20).mean()
-        price_change_pct = ((current_price - data['Close'].iloc[-5]) / data['Close'].iloc[-5]) * 100
+        sma_5 = close[-5:].mean()
+        sma_20 = close[-20:].mean()
+        price_change_pct = ((current_price - close[-5]) / close[-5]) * 100
         
         # Determine market outlook
         if sma_5 > sma_20 and price_change_pct > 2:
@@ -387,7 +364,7 @@ async def get_options_recommendations(symbol: str, db: Session = Depends(get_db)
             confidence = 0.6
         
         # Get options chain and strategies
-        options_chain = analyze_options_chain(symbol.upper(), current_price, 30)
+        options_chain = await analyze_options_chain(symbol.upper(), current_price, 30, sigma=sigma)
         strategies = generate_options_strategies(symbol.upper(), market_outlook, options_chain)
         
         # Create recommendations
@@ -409,20 +386,22 @@ async def get_options_recommendations(symbol: str, db: Session = Depends(get_db)
             }
             recommendations.append(recommendation)
         
-        # Save to database
-        for rec in recommendations:
-            db_recommendation = TradingRecommendations(
-                symbol=symbol.upper(),
-                recommendation_type="OPTIONS",
-                confidence_score=confidence,
-                technical_reasoning=rec['reasoning'],
-                risk_level="MEDIUM",
-                is_options=True,
-                option_strategy=rec['strategy']
-            )
-            db.add(db_recommendation)
-        
-        db.commit()
+        # Save to database in one multi-row INSERT
+        rows = [
+            {
+                "symbol": symbol.upper(),
+                "recommendation_type": "OPTIONS",
+                "confidence_score": confidence,
+                "technical_reasoning": rec['reasoning'],
+                "risk_level": "MEDIUM",
+                "is_options": True,
+                "option_strategy": rec['strategy']
+            }
+            for rec in recommendations
+        ]
+        if rows:
+            await db.execute(insert(TradingRecommendations), rows)
+            await db.commit()
         
         return {
             "symbol": symbol.upper(),
@@ -437,7 +416,7 @@ async def get_options_recommendations(symbol: str, db: Session = Depends(get_db)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/greeks/{symbol}")
-async def get_options_greeks(symbol: str, strike: float, option_type: str = "call", expiry_days: int = 30):
+async def get_options_greeks(symbol: str, strike: float, option_type: str = "call", expiry_days: int = 30) -> Dict[str, Any]:
     """Calculate option Greeks for specific strike and expiry"""
     try:
         # Get current price
@@ -447,22 +426,25 @@ async def get_options_greeks(symbol: str, strike: float, option_type: str = "cal
         if not yf_symbol:
             raise HTTPException(status_code=404, detail="Symbol not found")
         
-        ticker = yf.Ticker(yf_symbol)
-        data = ticker.history(period="1d", interval="1m")
-        current_price = data['Close'].iloc[-1]
+        # One 3-month fetch serves both the current price and volatility
+        data = await cached_history(yf_symbol, "3mo", "1d", ttl=DAILY_HISTORY_TTL)
+        
+        if data.empty:
+            raise HTTPException(status_code=404, detail="No data available")
+        
+        close = data['Close'].to_numpy(dtype=float)
+        current_price = float(close[-1])
         
         # Calculate Greeks
         T = expiry_days / 365.0
         risk_free_rate = 0.06
-        implied_vol = get_implied_volatility(symbol)
+        implied_vol = annualized_volatility(close)
         
-        bs_calculator = BlackScholesCalculator()
-        option_price = bs_calculator.calculate_option_price(
-            current_price, strike, T, risk_free_rate, implied_vol, option_type
-        )
-        greeks = bs_calculator.calculate_greeks(
-            current_price, strike, T, risk_free_rate, implied_vol, option_type
+        # Compiled single-option kernel (same formulas as the chain kernel)
+        option_price, delta, gamma, theta, vega = price_option(
+            current_price, float(strike), T, risk_free_rate, implied_vol, option_type.lower() == 'call'
         )
+        greeks = {'delta': delta, 'gamma': gamma, 'theta': theta, 'vega': vega}
         
         return {
             "symbol": symbol.upper(),
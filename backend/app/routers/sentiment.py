@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import Date, case, cast, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any
 import requests
+import numpy as np
 from bs4 import BeautifulSoup
-from textblob import TextBlob
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from ..database.connection import get_db, get_redis
 from ..database.models import SentimentAnalysis
@@ -25,18 +26,41 @@ class SentimentResponse(BaseModel):
 # Initialize sentiment analyzer
 vader_analyzer = SentimentIntensityAnalyzer()
 
+# Placeholder headline/post templates, filled in per symbol
+NEWS_TEMPLATES = (
+    "{symbol} shows strong performance in today's trading session",
+    "Market experts bullish on {symbol} prospects",
+    "{symbol} faces challenges amid market volatility",
+    "Technical analysis suggests {symbol} may see correction",
+    "{symbol} earnings report exceeds expectations"
+)
+SOCIAL_TEMPLATES = (
+    "$NIFTY looking strong today! Bullish on {symbol} 🚀",
+    "Not sure about {symbol} right now, might see a pullback",
+    "{symbol} technical setup looking good for swing trade",
+    "Sold my {symbol} position today, profit booking time",
+    "Adding more {symbol} to my portfolio on this dip"
+)
+
+def fill_templates(templates: tuple, symbol: str) -> List[str]:
+    """Substitute the symbol into each template"""
+    values = {"symbol": symbol}
+    return [template.format_map(values) for template in templates]
+
 def analyze_sentiment_vader(text: str) -> Dict[str, float]:
     """Analyze sentiment using VADER"""
     scores = vader_analyzer.polarity_scores(text)
     return scores
 
-def analyze_sentiment_textblob(text: str) -> Dict[str, float]:
-    """Analyze sentiment using TextBlob"""
-    blob = TextBlob(text)
-    return {
-        'polarity': blob.sentiment.polarity,
-        'subjectivity': blob.sentiment.subjectivity
-    }
+def score_texts(texts: List[str]):
+    """VADER compound scores and labels for a batch of texts"""
+    combined = np.fromiter(
+        (analyze_sentiment_vader(text)['compound'] for text in texts),
+        dtype=np.float64,
+        count=len(texts)
+    )
+    labels = np.where(combined > 0.1, 'positive', np.where(combined < -0.1, 'negative', 'neutral'))
+    return combined, labels
 
 def get_news_sentiment(symbol: str) -> List[Dict[str, Any]]:
     """Scrape and analyze news sentiment for a symbol"""
@@ -45,35 +69,21 @@ def get_news_sentiment(symbol: str) -> List[Dict[str, Any]]:
     try:
         # Search for news articles (using a news API or web scraping)
         # For demo purposes, using placeholder data
-        sample_headlines = [
-            f"{symbol} shows strong performance in today's trading session",
-            f"Market experts bullish on {symbol} prospects",
-            f"{symbol} faces challenges amid market volatility",
-            f"Technical analysis suggests {symbol} may see correction",
-            f"{symbol} earnings report exceeds expectations"
-        ]
+        sample_headlines = fill_templates(NEWS_TEMPLATES, symbol)
         
-        for headline in sample_headlines:
-            # Analyze sentiment
-            vader_scores = analyze_sentiment_vader(headline)
-            textblob_scores = analyze_sentiment_textblob(headline)
-            
-            # Combine scores
-            combined_score = (vader_scores['compound'] + textblob_scores['polarity']) / 2
-            
-            sentiment_label = 'neutral'
-            if combined_score > 0.1:
-                sentiment_label = 'positive'
-            elif combined_score < -0.1:
-                sentiment_label = 'negative'
-            
-            news_data.append({
+        # Analyze all headlines in one batch
+        scores, labels = score_texts(sample_headlines)
+        
+        news_data = [
+            {
                 'headline': headline,
-                'sentiment_score': combined_score,
-                'sentiment_label': sentiment_label,
-                'confidence': abs(combined_score),
+                'sentiment_score': score,
+                'sentiment_label': label,
+                'confidence': abs(score),
                 'source': 'news'
-            })
+            }
+            for headline, score, label in zip(sample_headlines, scores.tolist(), labels.tolist())
+        ]
     
     except Exception as e:
         print(f"Error fetching news sentiment: {e}")
@@ -86,35 +96,21 @@ def get_social_media_sentiment(symbol: str) -> List[Dict[str, Any]]:
     
     try:
         # Simulated social media posts
-        sample_posts = [
-            f"$NIFTY looking strong today! Bullish on {symbol} 🚀",
-            f"Not sure about {symbol} right now, might see a pullback",
-            f"{symbol} technical setup looking good for swing trade",
-            f"Sold my {symbol} position today, profit booking time",
-            f"Adding more {symbol} to my portfolio on this dip"
-        ]
+        sample_posts = fill_templates(SOCIAL_TEMPLATES, symbol)
         
-        for post in sample_posts:
-            # Analyze sentiment
-            vader_scores = analyze_sentiment_vader(post)
-            textblob_scores = analyze_sentiment_textblob(post)
-            
-            # Combine scores
-            combined_score = (vader_scores['compound'] + textblob_scores['polarity']) / 2
-            
-            sentiment_label = 'neutral'
-            if combined_score > 0.1:
-                sentiment_label = 'positive'
-            elif combined_score < -0.1:
-                sentiment_label = 'negative'
-            
-            social_data.append({
+        # Analyze all posts in one batch
+        scores, labels = score_texts(sample_posts)
+        
+        social_data = [
+            {
                 'content': post,
-                'sentiment_score': combined_score,
-                'sentiment_label': sentiment_label,
-                'confidence': abs(combined_score),
+                'sentiment_score': score,
+                'sentiment_label': label,
+                'confidence': abs(score),
                 'source': 'social_media'
-            })
+            }
+            for post, score, label in zip(sample_posts, scores.tolist(), labels.tolist())
+        ]
     
     except Exception as e:
         print(f"Error fetching social media sentiment: {e}")
@@ -122,7 +118,7 @@ def get_social_media_sentiment(symbol: str) -> List[Dict[str, Any]]:
     return social_data
 
 @router.get("/analyze/{symbol}")
-async def analyze_sentiment(symbol: str, db: Session = Depends(get_db)):
+async def analyze_sentiment(symbol: str, db: AsyncSession = Depends(get_db)) -> Dict[str, Any]:
     """Analyze overall sentiment for a symbol"""
     try:
         # Get sentiment data from different sources
@@ -135,9 +131,15 @@ async def analyze_sentiment(symbol: str, db: Session = Depends(get_db)):
             raise HTTPException(status_code=404, detail="No sentiment data found")
         
         # Calculate overall sentiment
-        total_score = sum(item['sentiment_score'] for item in all_sentiments)
-        avg_score = total_score / len(all_sentiments)
-        avg_confidence = sum(item['confidence'] for item in all_sentiments) / len(all_sentiments)
+        n = len(all_sentiments)
+        scores = np.fromiter((item['sentiment_score'] for item in all_sentiments), dtype=np.float64, count=n)
+        confidences = np.fromiter((item['confidence'] for item in all_sentiments), dtype=np.float64, count=n)
+        labels = np.array([item['sentiment_label'] for item in all_sentiments])
+        news_mask = np.array([item['source'] == 'news' for item in all_sentiments])
+        social_mask = ~news_mask
+        
+        avg_score = float(scores.mean())
+        avg_confidence = float(confidences.mean())
         
         # Determine overall sentiment label
         overall_sentiment = 'neutral'
@@ -147,23 +149,24 @@ async def analyze_sentiment(symbol: str, db: Session = Depends(get_db)):
             overall_sentiment = 'negative'
         
         # Count sentiment distribution
-        positive_count = sum(1 for item in all_sentiments if item['sentiment_label'] == 'positive')
-        negative_count = sum(1 for item in all_sentiments if item['sentiment_label'] == 'negative')
-        neutral_count = sum(1 for item in all_sentiments if item['sentiment_label'] == 'neutral')
-        
-        # Save individual sentiments to database
-        for sentiment_data in all_sentiments:
-            sentiment_record = SentimentAnalysis(
-                symbol=symbol.upper(),
-                source=sentiment_data['source'],
-                content=sentiment_data.get('headline') or sentiment_data.get('content'),
-                sentiment_score=sentiment_data['sentiment_score'],
-                sentiment_label=sentiment_data['sentiment_label'],
-                confidence=sentiment_data['confidence']
-            )
-            db.add(sentiment_record)
+        positive_count = int((labels == 'positive').sum())
+        negative_count = int((labels == 'negative').sum())
+        neutral_count = int((labels == 'neutral').sum())
         
-        db.commit()
+        # Save individual sentiments to database in one multi-row INSERT
+        rows = [
+            {
+                "symbol": symbol.upper(),
+                "source": sentiment_data['source'],
+                "content": sentiment_data.get('headline') or sentiment_data.get('content'),
+                "sentiment_score": sentiment_data['sentiment_score'],
+                "sentiment_label": sentiment_data['sentiment_label'],
+                "confidence": sentiment_data['confidence']
+            }
+            for sentiment_data in all_sentiments
+        ]
+        await db.execute(insert(SentimentAnalysis), rows)
+        await db.commit()
         
         return {
             "symbol": symbol.upper(),
@@ -178,11 +181,11 @@ async def analyze_sentiment(symbol: str, db: Session = Depends(get_db)):
             "sources": {
                 "news": {
                     "count": len(news_sentiment),
-                    "avg_score": sum(item['sentiment_score'] for item in news_sentiment) / len(news_sentiment) if news_sentiment else 0
+                    "avg_score": float(scores[news_mask].mean()) if news_mask.any() else 0
                 },
                 "social_media": {
                     "count": len(social_sentiment),
-                    "avg_score": sum(item['sentiment_score'] for item in social_sentiment) / len(social_sentiment) if social_sentiment else 0
+                    "avg_score": float(scores[social_mask].mean()) if social_mask.any() else 0
                 }
             },
             "details": all_sentiments,
@@ -196,48 +199,49 @@ async def analyze_sentiment(symbol: str, db: Session = Depends(get_db)):
 async def get_historical_sentiment(
     symbol: str, 
     days: int = 7, 
-    db: Session = Depends(get_db)
-):
+    db: AsyncSession = Depends(get_db)
+) -> Dict[str, Any]:
     """Get historical sentiment analysis"""
     try:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        # Query historical sentiment data
-        sentiments = db.query(SentimentAnalysis).filter(
-            SentimentAnalysis.symbol == symbol.upper(),
-            SentimentAnalysis.timestamp >= start_date,
-            SentimentAnalysis.timestamp <= end_date
-        ).all()
+        # Aggregate per day in the database (served by the symbol/timestamp index)
+        day = cast(SentimentAnalysis.timestamp, Date).label("day")
+        result = await db.execute(
+            select(
+                day,
+                func.avg(SentimentAnalysis.sentiment_score),
+                func.count(),
+                func.sum(case((SentimentAnalysis.sentiment_label == 'positive', 1), else_=0)),
+                func.sum(case((SentimentAnalysis.sentiment_label == 'negative', 1), else_=0))
+            )
+            .where(
+                SentimentAnalysis.symbol == symbol.upper(),
+                SentimentAnalysis.timestamp >= start_date,
+                SentimentAnalysis.timestamp <= end_date
+            )
+            .group_by(day)
+            .order_by(day)
+        )
+        rows = result.all()
         
-        if not sentiments:
+        if not rows:
             return {"message": "No historical sentiment data found", "data": []}
         
-        # Group by date
-        daily_sentiment = {}
-        for sentiment in sentiments:
-            date_key = sentiment.timestamp.date().isoformat()
-            if date_key not in daily_sentiment:
-                daily_sentiment[date_key] = []
-            daily_sentiment[date_key].append({
-                "score": sentiment.sentiment_score,
-                "label": sentiment.sentiment_label,
-                "source": sentiment.source
-            })
-        
         # Calculate daily averages
         daily_averages = []
-        for date, day_sentiments in daily_sentiment.items():
-            avg_score = sum(s['score'] for s in day_sentiments) / len(day_sentiments)
-            positive_count = sum(1 for s in day_sentiments if s['label'] == 'positive')
-            negative_count = sum(1 for s in day_sentiments if s['label'] == 'negative')
+        total_mentions = 0
+        for date, avg_score, mentions, positive_count, negative_count in rows:
+            avg_score = float(avg_score)
+            total_mentions += mentions
             
             daily_averages.append({
-                "date": date,
+                "date": date.isoformat(),
                 "avg_sentiment_score": avg_score,
-                "total_mentions": len(day_sentiments),
-                "positive_mentions": positive_count,
-                "negative_mentions": negative_count,
+                "total_mentions": mentions,
+                "positive_mentions": int(positive_count),
+                "negative_mentions": int(negative_count),
                 "sentiment_trend": "positive" if avg_score > 0.1 else "negative" if avg_score < -0.1 else "neutral"
             })
         
@@ -245,7 +249,7 @@ async def get_historical_sentiment(
             "symbol": symbol.upper(),
             "period_days": days,
             "daily_sentiment": daily_averages,
-            "total_mentions": len(sentiments),
+            "total_mentions": total_mentions,
             "timestamp": datetime.now().isoformat()
         }
         
@@ -253,7 +257,7 @@ async def get_historical_sentiment(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/trending")
-async def get_trending_sentiment():
+async def get_trending_sentiment() -> Dict[str, Any]:
     """Get trending sentiment across all symbols"""
     try:
         # Simulate trending sentiment data
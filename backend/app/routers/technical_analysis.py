@@ -1,273 +1,276 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import Dict, Any, List
+from fastapi import APIRouter, HTTPException
+from typing import Dict, Any, List, Tuple
 import pandas as pd
 import numpy as np
-import yfinance as yf
-from ..database.connection import get_db
-from ..database.models import TechnicalIndicators
-from pydantic import BaseModel
-from datetime import datetime
+from ..utils.yf_client import download_history, fetch_history
+from ..quant.indicator_kernel import compute_all, compute_batch
+from ..database.bulk import indicator_writer
+from datetime import datetime, timezone
+import asyncio
+import time
 
 router = APIRouter()
 
-class TechnicalAnalysisResponse(BaseModel):
-    symbol: str
-    timestamp: datetime
-    indicators: Dict[str, Any]
-    signals: Dict[str, str]
-    
-    class Config:
-        from_attributes = True
+# Supported symbols mapped to Yahoo Finance tickers
+_SYMBOL_MAP = {"NIFTY": "^NSEI", "SENSEX": "^BSESN", "BANKNIFTY": "^NSEBANK"}
 
-def calculate_vwap(data):
-    """Calculate Volume Weighted Average Price"""
-    typical_price = (data['High'] + data['Low'] + data['Close']) / 3
-    vwap = (typical_price * data['Volume']).cumsum() / data['Volume'].cumsum()
-    return vwap.iloc[-1]
+# In-process cache of daily history: yf_symbol -> (expires_at, DataFrame)
+HISTORY_TTL = 900
+_history_cache: Dict[str, Any] = {}
+_history_locks: Dict[str, asyncio.Lock] = {}
 
-def calculate_ema(data, period):
-    """Calculate Exponential Moving Average"""
-    return data['Close'].ewm(span=period).mean().iloc[-1]
+# Indices kept warm by the background refresher (one batched download each cycle).
+# Refreshed entries outlive the refresh interval so requests never see a gap.
+INDEX_SYMBOLS = tuple(_SYMBOL_MAP.values())
+HISTORY_REFRESH_INTERVAL = 900
+_refresh_task = None
 
-def calculate_macd(data):
-    """Calculate MACD"""
-    ema12 = data['Close'].ewm(span=12).mean()
-    ema26 = data['Close'].ewm(span=26).mean()
-    macd = ema12 - ema26
-    signal = macd.ewm(span=9).mean()
-    histogram = macd - signal
-    
-    return {
-        'macd': macd.iloc[-1],
-        'signal': signal.iloc[-1],
-        'histogram': histogram.iloc[-1]
-    }
+# Signal scores: +1 bullish (or oversold), -1 bearish (or overbought), 0 neutral.
+# Labels are indexed by score, so index -1 picks the last entry.
+SIGNAL_NAMES = ('rsi', 'macd', 'bollinger', 'supertrend', 'ema')
+_OSCILLATOR_LABELS = ('neutral', 'oversold', 'overbought')
+_TREND_LABELS = ('neutral', 'bullish', 'bearish')
+SIGNAL_LABELS = (_OSCILLATOR_LABELS, _TREND_LABELS, _OSCILLATOR_LABELS, _TREND_LABELS, _TREND_LABELS)
+
+# Retracement ratios measured down from the period high
+FIBONACCI_RATIOS = np.array([0.0, 0.236, 0.382, 0.5, 0.618, 1.0])
+FIBONACCI_LABELS = ('0%', '23.6%', '38.2%', '50%', '61.8%', '100%')
 
-def calculate_rsi(data, period=14):
-    """Calculate RSI"""
-    delta = data['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi.iloc[-1]
+def classify_signals(rsi, macd, macd_signal, price, bb_upper, bb_lower, supertrend_bullish, ema_9, ema_21) -> np.ndarray:
+    """Branchless signal scores in SIGNAL_NAMES order"""
+    return np.array([
+        int(rsi < 30) - int(rsi > 70),
+        2 * int(macd > macd_signal) - 1,
+        int(price < bb_lower) - int(price > bb_upper),
+        2 * int(supertrend_bullish) - 1,
+        2 * int(ema_9 > ema_21) - 1
+    ], dtype=np.int8)
 
-def calculate_bollinger_bands(data, period=20, std=2):
-    """Calculate Bollinger Bands"""
-    middle = data['Close'].rolling(window=period).mean()
-    std_dev = data['Close'].rolling(window=period).std()
-    upper = middle + (std_dev * std)
-    lower = middle - (std_dev * std)
+async def get_history(yf_symbol: str) -> pd.DataFrame:
+    """3-month daily history, fetched at most once per HISTORY_TTL per symbol"""
+    cached = _history_cache.get(yf_symbol)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
     
-    return {
-        'upper': upper.iloc[-1],
-        'middle': middle.iloc[-1],
-        'lower': lower.iloc[-1]
-    }
+    # Concurrent misses for the same symbol wait on one fetch instead of each calling Yahoo
+    lock = _history_locks.setdefault(yf_symbol, asyncio.Lock())
+    async with lock:
+        cached = _history_cache.get(yf_symbol)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        data = await fetch_history(yf_symbol, "3mo", "1d")
+        if not data.empty:
+            _history_cache[yf_symbol] = (time.monotonic() + HISTORY_TTL, data)
+        return data
 
-def calculate_supertrend(data, period=10, multiplier=3):
-    """Calculate Supertrend"""
-    hl2 = (data['High'] + data['Low']) / 2
-    atr = calculate_atr(data, period)
+async def refresh_history():
+    """Download every index in one batch and replace their cache entries"""
+    try:
+        frames = await download_history(INDEX_SYMBOLS, "3mo", "1d")
+    except Exception as e:
+        print(f"Error refreshing index history: {e}")
+        return
     
-    basic_upper = hl2 + (multiplier * atr)
-    basic_lower = hl2 - (multiplier * atr)
+    expires_at = time.monotonic() + HISTORY_REFRESH_INTERVAL + HISTORY_TTL
+    for yf_symbol, data in frames.items():
+        if not data.empty:
+            _history_cache[yf_symbol] = (expires_at, data)
+
+async def _refresh_loop():
+    while True:
+        await refresh_history()
+        await asyncio.sleep(HISTORY_REFRESH_INTERVAL)
+
+def start_history_refresher():
+    global _refresh_task
+    if _refresh_task is None:
+        _refresh_task = asyncio.create_task(_refresh_loop())
+
+async def stop_history_refresher():
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+
+def calculate_fibonacci_levels(high, low):
+    """Calculate Fibonacci retracement levels"""
+    high = high.max()
+    diff = high - low.min()
     
-    # Simplified supertrend calculation
-    current_close = data['Close'].iloc[-1]
-    upper_band = basic_upper.iloc[-1]
-    lower_band = basic_lower.iloc[-1]
+    return dict(zip(FIBONACCI_LABELS, (high - FIBONACCI_RATIOS * diff).tolist()))
+
+def calculate_volume_profile(close, volume, bins=10):
+    """Calculate simplified volume profile"""
+    # Volume-weighted histogram of closes over equal-width price bins
+    low, high = float(np.nanmin(close)), float(np.nanmax(close))
+    if low == high:
+        pad = 0.001 * abs(low) if low != 0 else 0.001
+        low, high = low - pad, high + pad
     
-    if current_close > upper_band:
-        trend = "bullish"
-        supertrend_value = lower_band
-    else:
-        trend = "bearish"
-        supertrend_value = upper_band
+    edges = np.linspace(low, high, bins + 1)
+    volumes, _ = np.histogram(close, bins=edges, weights=volume)
     
-    return {
-        'value': supertrend_value,
-        'trend': trend
-    }
+    return {f"{edges[i]:.2f}-{edges[i + 1]:.2f}": int(volumes[i]) for i in range(bins)}
 
-def calculate_atr(data, period=14):
-    """Calculate Average True Range"""
-    high_low = data['High'] - data['Low']
-    high_close = np.abs(data['High'] - data['Close'].shift())
-    low_close = np.abs(data['Low'] - data['Close'].shift())
-    
-    true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    atr = true_range.rolling(window=period).mean()
-    return atr.iloc[-1]
+def extract_columns(data: pd.DataFrame) -> np.ndarray:
+    """Kernel input: high, low, close and volume as a (4, n) float32 block, one contiguous row each"""
+    return np.ascontiguousarray(
+        data[['High', 'Low', 'Close', 'Volume']].to_numpy(dtype=np.float32).T
+    )
 
-def calculate_fibonacci_levels(data):
-    """Calculate Fibonacci retracement levels"""
-    high = data['High'].max()
-    low = data['Low'].min()
-    diff = high - low
+def build_analysis(symbol: str, data: pd.DataFrame, results) -> Tuple[Dict[str, Any], np.ndarray]:
+    """Analysis payload and signal scores from the kernel's scalar indicators
+
+    Prices reported as-is (current price, Fibonacci extremes, volume profile) come
+    from the float64 history rather than the kernel's float32 inputs.
+    """
+    high = data['High'].to_numpy(dtype=np.float64)
+    low = data['Low'].to_numpy(dtype=np.float64)
+    close = data['Close'].to_numpy(dtype=np.float64)
+    volume = data['Volume'].to_numpy(dtype=np.float64)
+    (vwap, ema_9, ema_21, macd, macd_signal, macd_histogram, rsi,
+     bb_upper, bb_middle, bb_lower, atr, adx, supertrend, supertrend_bullish) = results
     
-    levels = {
-        '0%': high,
-        '23.6%': high - 0.236 * diff,
-        '38.2%': high - 0.382 * diff,
-        '50%': high - 0.5 * diff,
-        '61.8%': high - 0.618 * diff,
-        '100%': low
+    indicators = {
+        'vwap': vwap,
+        'ema_9': ema_9,
+        'ema_21': ema_21,
+        'macd': {'macd': macd, 'signal': macd_signal, 'histogram': macd_histogram},
+        'rsi': rsi,
+        'bollinger_bands': {'upper': bb_upper, 'middle': bb_middle, 'lower': bb_lower},
+        'supertrend': {'value': supertrend, 'trend': 'bullish' if supertrend_bullish else 'bearish'},
+        'atr': atr,
+        'fibonacci_levels': calculate_fibonacci_levels(high, low),
+        'volume_profile': calculate_volume_profile(close, volume),
+        'adx': adx
     }
     
-    return levels
-
-def calculate_volume_profile(data):
-    """Calculate simplified volume profile"""
-    # Group by price ranges and sum volumes
-    price_ranges = pd.cut(data['Close'], bins=10)
-    volume_profile = data.groupby(price_ranges)['Volume'].sum().to_dict()
-    
-    # Convert to serializable format
-    profile = {}
-    for range_key, volume in volume_profile.items():
-        if pd.notna(range_key):
-            profile[f"{range_key.left:.2f}-{range_key.right:.2f}"] = int(volume)
+    # Generate signals
+    current_price = float(close[-1])
+    scores = classify_signals(
+        rsi, macd, macd_signal, current_price, bb_upper, bb_lower, supertrend_bullish, ema_9, ema_21
+    )
+    signals = {
+        name: labels[score]
+        for name, labels, score in zip(SIGNAL_NAMES, SIGNAL_LABELS, scores.tolist())
+    }
     
-    return profile
+    return {
+        "symbol": symbol,
+        "timestamp": datetime.now().isoformat(),
+        "current_price": current_price,
+        "indicators": indicators,
+        "signals": signals
+    }, scores
 
-def calculate_adx(data, period=14):
-    """Calculate ADX"""
-    # Simplified ADX calculation
-    high_diff = data['High'].diff()
-    low_diff = -data['Low'].diff()
+def indicator_row(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """TechnicalIndicators row for an analysis payload"""
+    indicators = analysis['indicators']
+    return {
+        "symbol": analysis['symbol'],
+        "timestamp": datetime.now(timezone.utc),
+        "vwap": indicators['vwap'],
+        "ema_9": indicators['ema_9'],
+        "ema_21": indicators['ema_21'],
+        "macd": indicators['macd']['macd'],
+        "macd_signal": indicators['macd']['signal'],
+        "macd_histogram": indicators['macd']['histogram'],
+        "rsi": indicators['rsi'],
+        "bb_upper": indicators['bollinger_bands']['upper'],
+        "bb_middle": indicators['bollinger_bands']['middle'],
+        "bb_lower": indicators['bollinger_bands']['lower'],
+        "supertrend": indicators['supertrend']['value'],
+        "supertrend_signal": indicators['supertrend']['trend'],
+        "atr": indicators['atr'],
+        "fibonacci_levels": indicators['fibonacci_levels'],
+        "volume_profile": indicators['volume_profile'],
+        "adx": indicators['adx']
+    }
+
+async def compute_analysis(symbol: str) -> Tuple[Dict[str, Any], np.ndarray]:
+    """Indicators, signals and signal scores for a symbol from cached history (no persistence)"""
+    # Map symbol to Yahoo Finance
+    symbol = symbol.upper()
+    yf_symbol = _SYMBOL_MAP.get(symbol)
     
-    plus_dm = high_diff.where(high_diff > low_diff, 0).where(high_diff > 0, 0)
-    minus_dm = low_diff.where(low_diff > high_diff, 0).where(low_diff > 0, 0)
+    if not yf_symbol:
+        raise HTTPException(status_code=404, detail="Symbol not found")
     
-    atr = calculate_atr(data, period)
-    plus_di = 100 * (plus_dm.rolling(window=period).mean() / atr)
-    minus_di = 100 * (minus_dm.rolling(window=period).mean() / atr)
+    # Get historical data
+    data = await get_history(yf_symbol)
     
-    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-    adx = dx.rolling(window=period).mean()
+    if data.empty:
+        raise HTTPException(status_code=404, detail="No data available")
     
-    return adx.iloc[-1] if not pd.isna(adx.iloc[-1]) else 0
+    # Calculate all scalar indicators in one compiled pass
+    return build_analysis(symbol, data, compute_all(*extract_columns(data)))
 
 @router.get("/analyze/{symbol}")
-async def analyze_symbol(symbol: str, db: Session = Depends(get_db)):
+async def analyze_symbol(symbol: str) -> Dict[str, Any]:
     """Perform comprehensive technical analysis"""
     try:
-        # Map symbol to Yahoo Finance
-        symbol_map = {"NIFTY": "^NSEI", "SENSEX": "^BSESN", "BANKNIFTY": "^NSEBANK"}
-        yf_symbol = symbol_map.get(symbol.upper())
+        analysis, _ = await compute_analysis(symbol)
         
-        if not yf_symbol:
-            raise HTTPException(status_code=404, detail="Symbol not found")
+        # Queue the snapshot for the batched insert instead of committing per request
+        indicator_writer.put(indicator_row(analysis))
         
-        # Get historical data
-        ticker = yf.Ticker(yf_symbol)
-        data = ticker.history(period="3mo", interval="1d")
+        return analysis
         
-        if data.empty:
-            raise HTTPException(status_code=404, detail="No data available")
-        
-        # Calculate all indicators
-        indicators = {
-            'vwap': calculate_vwap(data),
-            'ema_9': calculate_ema(data, 9),
-            'ema_21': calculate_ema(data, 21),
-            'macd': calculate_macd(data),
-            'rsi': calculate_rsi(data),
-            'bollinger_bands': calculate_bollinger_bands(data),
-            'supertrend': calculate_supertrend(data),
-            'atr': calculate_atr(data),
-            'fibonacci_levels': calculate_fibonacci_levels(data),
-            'volume_profile': calculate_volume_profile(data),
-            'adx': calculate_adx(data)
-        }
-        
-        # Generate signals
-        current_price = data['Close'].iloc[-1]
-        signals = {}
-        
-        # RSI signals
-        rsi = indicators['rsi']
-        if rsi > 70:
-            signals['rsi'] = 'overbought'
-        elif rsi < 30:
-            signals['rsi'] = 'oversold'
-        else:
-            signals['rsi'] = 'neutral'
-        
-        # MACD signals
-        macd_data = indicators['macd']
-        if macd_data['macd'] > macd_data['signal']:
-            signals['macd'] = 'bullish'
-        else:
-            signals['macd'] = 'bearish'
-        
-        # Bollinger Bands signals
-        bb = indicators['bollinger_bands']
-        if current_price > bb['upper']:
-            signals['bollinger'] = 'overbought'
-        elif current_price < bb['lower']:
-            signals['bollinger'] = 'oversold'
-        else:
-            signals['bollinger'] = 'neutral'
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/analyze_all")
+async def analyze_all() -> Dict[str, Any]:
+    """Technical analysis for every supported index in one call"""
+    try:
+        frames = await asyncio.gather(*(get_history(yf_symbol) for yf_symbol in _SYMBOL_MAP.values()))
+        available = [(symbol, data) for symbol, data in zip(_SYMBOL_MAP, frames) if not data.empty]
         
-        # Supertrend signal
-        signals['supertrend'] = indicators['supertrend']['trend']
+        if not available:
+            raise HTTPException(status_code=404, detail="No data available")
         
-        # EMA signals
-        ema_9 = indicators['ema_9']
-        ema_21 = indicators['ema_21']
-        if ema_9 > ema_21:
-            signals['ema'] = 'bullish'
-        else:
-            signals['ema'] = 'bearish'
+        # Stack the histories right-aligned into (symbols, bars) blocks; shorter ones are
+        # left-padded and the kernel starts each row at its first real bar
+        columns = [extract_columns(data) for _, data in available]
+        lengths = np.array([c.shape[1] for c in columns], dtype=np.int64)
+        n_bars = int(lengths.max())
+        stacked = np.zeros((4, len(columns), n_bars), dtype=np.float32)
+        for i, c in enumerate(columns):
+            stacked[:, i, n_bars - c.shape[1]:] = c
         
-        # Save to database
-        tech_indicators = TechnicalIndicators(
-            symbol=symbol.upper(),
-            vwap=indicators['vwap'],
-            ema_9=indicators['ema_9'],
-            ema_21=indicators['ema_21'],
-            macd=macd_data['macd'],
-            macd_signal=macd_data['signal'],
-            macd_histogram=macd_data['histogram'],
-            rsi=indicators['rsi'],
-            bb_upper=bb['upper'],
-            bb_middle=bb['middle'],
-            bb_lower=bb['lower'],
-            supertrend=indicators['supertrend']['value'],
-            supertrend_signal=indicators['supertrend']['trend'],
-            atr=indicators['atr'],
-            fibonacci_levels=indicators['fibonacci_levels'],
-            volume_profile=indicators['volume_profile'],
-            adx=indicators['adx']
-        )
+        results = compute_batch(*stacked, n_bars - lengths)
         
-        db.add(tech_indicators)
-        db.commit()
+        analyses = {}
+        for (symbol, data), row in zip(available, results.tolist()):
+            row[13] = bool(row[13])
+            analysis, _ = build_analysis(symbol, data, row)
+            indicator_writer.put(indicator_row(analysis))
+            analyses[symbol] = analysis
         
         return {
-            "symbol": symbol.upper(),
-            "timestamp": datetime.now().isoformat(),
-            "current_price": current_price,
-            "indicators": indicators,
-            "signals": signals
+            "analyses": analyses,
+            "timestamp": datetime.now().isoformat()
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/signals/{symbol}")
-async def get_trading_signals(symbol: str):
+async def get_trading_signals(symbol: str) -> Dict[str, Any]:
     """Get trading signals summary"""
     try:
-        analysis = await analyze_symbol(symbol)
+        # Same computation as /analyze, without re-persisting a row per call
+        analysis, scores = await compute_analysis(symbol)
         signals = analysis['signals']
         
         # Count bullish/bearish signals
-        bullish_count = sum(1 for signal in signals.values() if signal in ['bullish', 'oversold'])
-        bearish_count = sum(1 for signal in signals.values() if signal in ['bearish', 'overbought'])
+        bullish_count = int((scores > 0).sum())
+        bearish_count = int((scores < 0).sum())
         
         overall_signal = 'neutral'
         if bullish_count > bearish_count:
@@ -276,7 +279,7 @@ async def get_trading_signals(symbol: str):
             overall_signal = 'bearish'
         
         return {
-            "symbol": symbol.upper(),
+            "symbol": analysis['symbol'],
             "overall_signal": overall_signal,
             "bullish_indicators": bullish_count,
             "bearish_indicators": bearish_count,
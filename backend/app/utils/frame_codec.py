@@ -0,0 +1,47 @@
+from typing import Any, Dict
+import numpy as np
+import orjson
+import pandas as pd
+
+# DataFrames shared through Redis are encoded as plain JSON data (column values,
+# dtypes and the index), never pickled, so a cache entry cannot run code on load.
+# orjson writes floats with round-trip precision, so values come back exactly.
+
+def dumps_frame(data: pd.DataFrame) -> bytes:
+    """Encode a DataFrame with a DatetimeIndex (or a plain index) as JSON bytes"""
+    index: Dict[str, Any] = {"name": data.index.name}
+    if isinstance(data.index, pd.DatetimeIndex):
+        index["unit"] = data.index.unit
+        index["ticks"] = data.index.asi8
+        index["tz"] = str(data.index.tz) if data.index.tz is not None else None
+    else:
+        index["values"] = data.index.tolist()
+
+    payload = {
+        "index": index,
+        "columns": [
+            {"name": name, "dtype": str(column.dtype), "values": column.to_numpy()}
+            for name, column in data.items()
+        ]
+    }
+    return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+
+def loads_frame(raw: bytes) -> pd.DataFrame:
+    """Decode bytes written by dumps_frame"""
+    payload = orjson.loads(raw)
+    index = payload["index"]
+    if "ticks" in index:
+        ticks = np.array(index["ticks"], dtype=np.int64).view(f"datetime64[{index['unit']}]")
+        index_values = pd.DatetimeIndex(ticks, name=index["name"])
+        if index["tz"] is not None:
+            index_values = index_values.tz_localize("UTC").tz_convert(index["tz"])
+    else:
+        index_values = pd.Index(index["values"], name=index["name"])
+
+    return pd.DataFrame(
+        {
+            column["name"]: np.array(column["values"], dtype=column["dtype"])
+            for column in payload["columns"]
+        },
+        index=index_values
+    )
@@ -0,0 +1,27 @@
+import time
+import pandas as pd
+from ..database.connection import get_redis_binary
+from .frame_codec import dumps_frame, loads_frame
+from .yf_client import fetch_history
+
+async def cached_history(yf_symbol: str, period: str, interval: str, ttl: int = 120) -> pd.DataFrame:
+    """Yahoo Finance history through a Redis cache bucketed by `ttl` seconds"""
+    key = f"yf:{yf_symbol}:{period}:{interval}:{int(time.time() // ttl)}"
+    redis_client = get_redis_binary()
+
+    try:
+        cached = await redis_client.get(key)
+        if cached:
+            return loads_frame(cached)
+    except Exception as e:
+        print(f"History cache read failed for {key}: {e}")
+
+    data = await fetch_history(yf_symbol, period, interval)
+
+    if not data.empty:
+        try:
+            await redis_client.set(key, dumps_frame(data), ex=ttl)
+        except Exception as e:
+            print(f"History cache write failed for {key}: {e}")
+
+    return data
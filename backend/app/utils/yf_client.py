@@ -0,0 +1,37 @@
+import asyncio
+from typing import Dict, Sequence
+import pandas as pd
+import yfinance as yf
+
+# yfinance manages its own process-wide HTTP session (curl_cffi with browser
+# impersonation, which Yahoo requires), so no session is passed in here
+
+def get_ticker(yf_symbol: str) -> yf.Ticker:
+    """Create a Ticker using yfinance's shared session"""
+    return yf.Ticker(yf_symbol)
+
+async def fetch_history(yf_symbol: str, period: str, interval: str) -> pd.DataFrame:
+    """Run the blocking Ticker.history call in a worker thread"""
+    return await asyncio.to_thread(get_ticker(yf_symbol).history, period=period, interval=interval)
+
+async def download_history(yf_symbols: Sequence[str], period: str, interval: str) -> Dict[str, pd.DataFrame]:
+    """Fetch history for several symbols with one batched yf.download call"""
+    data = await asyncio.to_thread(
+        yf.download,
+        list(yf_symbols),
+        period=period,
+        interval=interval,
+        group_by="ticker",
+        auto_adjust=True,
+        progress=False
+    )
+    if data is None or data.empty:
+        return {}
+
+    # Rows are aligned across tickers, so drop the dates a symbol did not trade
+    downloaded = set(data.columns.get_level_values(0))
+    return {
+        yf_symbol: data[yf_symbol].dropna(how="all")
+        for yf_symbol in yf_symbols
+        if yf_symbol in downloaded
+    }
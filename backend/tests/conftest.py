@@ -0,0 +1,5 @@
+import os
+
+# Settings require the service passwords; tests never open a connection
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+os.environ.setdefault("REDIS_PASSWORD", "test")
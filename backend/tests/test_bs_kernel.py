@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from scipy.stats import norm
+
+from app.quant.bs_kernel import chain_greeks, price_option
+
+R = 0.06
+CASES = [
+    (20000.0, 30 / 365, 0.15),
+    (20000.0, 7 / 365, 0.30),
+    (45000.0, 60 / 365, 0.20),
+    (100.0, 0.5, 0.40),
+]
+
+def reference(S, K, T, r, sigma):
+    """Textbook Black-Scholes with scipy's normal distribution"""
+    K = np.asarray(K, dtype=np.float64)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
+    d2 = d1 - sigma * np.sqrt(T)
+    disc = np.exp(-r * T)
+    pdf = norm.pdf(d1)
+    theta_common = -(S * pdf * sigma) / (2 * np.sqrt(T))
+    return {
+        'call_premium': np.maximum(0.0, S * norm.cdf(d1) - K * disc * norm.cdf(d2)),
+        'put_premium': np.maximum(0.0, K * disc * norm.cdf(-d2) - S * norm.cdf(-d1)),
+        'call_delta': norm.cdf(d1),
+        'put_delta': norm.cdf(d1) - 1,
+        'gamma': pdf / (S * sigma * np.sqrt(T)),
+        'vega': S * pdf * np.sqrt(T) / 100,
+        'call_theta': (theta_common - r * K * disc * norm.cdf(d2)) / 365,
+        'put_theta': (theta_common + r * K * disc * norm.cdf(-d2)) / 365,
+    }
+
+def strikes_around(S):
+    return np.round(S * np.linspace(0.8, 1.2, 17))
+
+@pytest.mark.parametrize("S,T,sigma", CASES)
+def test_chain_greeks_matches_scipy(S, T, sigma):
+    K = strikes_around(S)
+    chain = chain_greeks(S, K, T, R, sigma)
+    expected = reference(S, K, T, R, sigma)
+
+    for name, values in expected.items():
+        np.testing.assert_allclose(chain[name], values, rtol=1e-9, atol=1e-9, err_msg=name)
+
+@pytest.mark.parametrize("S,T,sigma", CASES)
+@pytest.mark.parametrize("is_call", [True, False])
+def test_price_option_matches_scipy(S, T, sigma, is_call):
+    kind = 'call' if is_call else 'put'
+    for K in strikes_around(S)[::4]:
+        expected = reference(S, K, T, R, sigma)
+        premium, delta, gamma, theta, vega = price_option(S, K, T, R, sigma, is_call)
+
+        np.testing.assert_allclose(
+            [premium, delta, gamma, theta, vega],
+            [expected[f'{kind}_premium'], expected[f'{kind}_delta'], expected['gamma'],
+             expected[f'{kind}_theta'], expected['vega']],
+            rtol=1e-9, atol=1e-9
+        )
+
+@pytest.mark.parametrize("T,sigma", [(0.0, 0.2), (30 / 365, 0.0), (0.0, 0.0)])
+def test_degenerate_inputs_return_zeros(T, sigma):
+    K = strikes_around(20000.0)
+    chain = chain_greeks(20000.0, K, T, R, sigma)
+
+    for name, values in chain.items():
+        assert np.all(values == 0.0), name
+    for is_call in (True, False):
+        assert price_option(20000.0, 20000.0, T, R, sigma, is_call) == (0.0, 0.0, 0.0, 0.0, 0.0)
+
+def test_non_positive_strike_is_zeroed():
+    chain = chain_greeks(20000.0, np.array([0.0, 20000.0]), 30 / 365, R, 0.2)
+
+    assert all(values[0] == 0.0 for values in chain.values())
+    assert chain['call_premium'][1] > 0.0
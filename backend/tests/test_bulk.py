@@ -0,0 +1,90 @@
+import asyncio
+
+from app.database.bulk import BatchWriter
+
+class Recorder:
+    """Fake flush callback that records each batch it is handed"""
+
+    def __init__(self):
+        self.batches = []
+
+    async def __call__(self, batch):
+        self.batches.append(list(batch))
+
+def run(coro):
+    # Fail instead of hanging if the writer never finishes
+    return asyncio.run(asyncio.wait_for(coro, 5))
+
+def test_batches_split_at_max_batch():
+    async def scenario():
+        flush = Recorder()
+        writer = BatchWriter(flush, max_batch=3, interval=0.05)
+        for i in range(7):
+            writer.put(i)
+        writer.start()
+        await asyncio.sleep(0.01)
+        full = list(flush.batches)
+        await asyncio.sleep(0.1)
+        await writer.stop()
+        return full, flush.batches
+
+    full, batches = run(scenario())
+
+    # Full batches go out immediately, the remainder after the interval
+    assert full == [[0, 1, 2], [3, 4, 5]]
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+def test_partial_batch_flushed_after_interval():
+    async def scenario():
+        flush = Recorder()
+        writer = BatchWriter(flush, max_batch=100, interval=0.05)
+        writer.start()
+        writer.put('a')
+        writer.put('b')
+        await asyncio.sleep(0.01)
+        early = list(flush.batches)
+        await asyncio.sleep(0.1)
+        late = list(flush.batches)
+        await writer.stop()
+        return early, late
+
+    early, late = run(scenario())
+
+    assert early == []
+    assert late == [['a', 'b']]
+
+def test_put_sheds_rows_when_full():
+    async def scenario():
+        writer = BatchWriter(Recorder(), maxsize=2)
+        return [writer.put(i) for i in range(4)], writer.dropped, writer.queue.qsize()
+
+    accepted, dropped, queued = run(scenario())
+
+    assert accepted == [True, True, False, False]
+    assert dropped == 2
+    assert queued == 2
+
+def test_stop_flushes_dequeued_and_queued_rows():
+    async def scenario():
+        flush = Recorder()
+        writer = BatchWriter(flush, max_batch=2, interval=10)
+        writer.start()
+        writer.put('a')
+        # The consumer takes 'a' and waits out the interval for more rows
+        await asyncio.sleep(0.01)
+        assert writer.queue.empty()
+        for row in ('b', 'c', 'd'):
+            writer.put(row)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await writer.stop()
+        return flush.batches, writer.queue.qsize(), loop.time() - started
+
+    batches, queued, elapsed = run(scenario())
+
+    # Shutting down must not wait out the interval
+    assert elapsed < 1
+
+    assert sorted(row for batch in batches for row in batch) == ['a', 'b', 'c', 'd']
+    assert all(len(batch) <= 2 for batch in batches)
+    assert queued == 0
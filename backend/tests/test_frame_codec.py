@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.frame_codec import dumps_frame, loads_frame
+
+def history() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            'Open': 20000 * rng.random(5),
+            'Close': [20001.123456789012, np.nan, 20003.5, 20004.25, 1e-300],
+            'Volume': np.arange(5, dtype=np.int64) * 1_000_000
+        },
+        index=pd.date_range('2024-01-01', periods=5, tz='Asia/Kolkata', name='Date')
+    )
+
+@pytest.mark.parametrize("transform", [
+    lambda d: d,
+    lambda d: d.tz_localize(None),
+    lambda d: d.set_index(d.index.as_unit('ns')),
+    lambda d: d.reset_index(drop=True),
+    lambda d: d.iloc[:0],
+])
+def test_round_trip_is_exact(transform):
+    data = transform(history())
+
+    pd.testing.assert_frame_equal(loads_frame(dumps_frame(data)), data, check_freq=False)
+
+def test_payload_is_plain_json():
+    assert dumps_frame(history()).startswith(b'{"index":')
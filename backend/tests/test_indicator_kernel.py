@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.quant.indicator_kernel import (
+    ADX_PERIOD,
+    ATR_PERIOD,
+    BB_PERIOD,
+    BB_STD,
+    RSI_PERIOD,
+    SUPERTREND_MULTIPLIER,
+    SUPERTREND_PERIOD,
+    compute_all,
+    compute_batch,
+)
+
+NAMES = [
+    'vwap', 'ema_9', 'ema_21', 'macd', 'macd_signal', 'macd_histogram', 'rsi',
+    'bb_upper', 'bb_middle', 'bb_lower', 'atr', 'adx', 'supertrend', 'supertrend_bullish'
+]
+
+def ohlcv(n: int, seed: int = 0) -> np.ndarray:
+    """Random-walk (4, n) float32 block of high, low, close and volume"""
+    rng = np.random.default_rng(seed)
+    close = 20000 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    spread = close * rng.uniform(0.002, 0.015, n)
+    high = close + spread * rng.uniform(0, 1, n)
+    low = close - spread * rng.uniform(0, 1, n)
+    volume = rng.integers(100_000, 1_000_000, n)
+    return np.ascontiguousarray(np.stack([high, low, close, volume]).astype(np.float32))
+
+def wilder(values: pd.Series, period: int, start: int = 1) -> pd.Series:
+    """Wilder smoothing of values[start:]: SMA of the first period, then alpha = 1 / period"""
+    values = values.iloc[start:]
+    seeded = values.iloc[period - 1:].copy()
+    if seeded.empty:
+        return seeded
+    seeded.iloc[0] = values.iloc[:period].mean()
+    return seeded.ewm(alpha=1 / period, adjust=False).mean()
+
+def last(series: pd.Series) -> float:
+    return series.iloc[-1] if len(series) else np.nan
+
+def reference(high, low, close, volume) -> dict:
+    """The same indicators written with pandas in float64"""
+    high, low, close, volume = (pd.Series(np.asarray(a, dtype=np.float64)) for a in (high, low, close, volume))
+    prev_close = close.shift(1)
+
+    ema = lambda s, span: s.ewm(span=span, adjust=False).mean()
+    macd = ema(close, 12) - ema(close, 26)
+    signal = ema(macd, 9)
+
+    delta = close.diff()
+    rsi = 100 - 100 / (1 + last(wilder(delta.clip(lower=0), RSI_PERIOD)) / last(wilder(-delta.clip(upper=0), RSI_PERIOD)))
+
+    window = close.tail(BB_PERIOD) if len(close) >= BB_PERIOD else pd.Series(dtype=float)
+    bb_middle = window.mean() if len(window) else np.nan
+    bb_std = window.std() if len(window) else np.nan
+
+    tr = pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+    up = high.diff()
+    down = -low.diff()
+    plus_dm = up.where((up > down) & (up > 0), 0.0)
+    minus_dm = down.where((down > up) & (down > 0), 0.0)
+
+    smooth_tr = wilder(tr, ADX_PERIOD).reindex(close.index)
+    plus_di = 100 * wilder(plus_dm, ADX_PERIOD).reindex(close.index) / smooth_tr
+    minus_di = 100 * wilder(minus_dm, ADX_PERIOD).reindex(close.index) / smooth_tr
+    dx = (100 * (plus_di - minus_di).abs() / (plus_di + minus_di)).fillna(0.0)
+    adx = last(wilder(dx, ADX_PERIOD, start=ADX_PERIOD))
+
+    hl2 = (high.iloc[-1] + low.iloc[-1]) / 2
+    st_atr = last(wilder(tr, SUPERTREND_PERIOD))
+    st_upper = hl2 + SUPERTREND_MULTIPLIER * st_atr
+    st_lower = hl2 - SUPERTREND_MULTIPLIER * st_atr
+    st_bullish = bool(close.iloc[-1] > st_upper)
+
+    return {
+        'vwap': ((high + low + close) / 3 * volume).sum() / volume.sum(),
+        'ema_9': ema(close, 9).iloc[-1],
+        'ema_21': ema(close, 21).iloc[-1],
+        'macd': macd.iloc[-1],
+        'macd_signal': signal.iloc[-1],
+        'macd_histogram': macd.iloc[-1] - signal.iloc[-1],
+        'rsi': rsi,
+        'bb_upper': bb_middle + BB_STD * bb_std,
+        'bb_middle': bb_middle,
+        'bb_lower': bb_middle - BB_STD * bb_std,
+        'atr': last(wilder(tr, ATR_PERIOD)),
+        'adx': 0.0 if np.isnan(adx) else adx,
+        'supertrend': st_lower if st_bullish else st_upper,
+        'supertrend_bullish': st_bullish,
+    }
+
+def assert_matches_reference(columns: np.ndarray):
+    results = dict(zip(NAMES, compute_all(*columns)))
+    # Flat RSI windows and zero volume divide 0 by 0, as the kernel does
+    with np.errstate(invalid='ignore', divide='ignore'):
+        expected = reference(*columns)
+    # Price-level values are summed partly in float32; allow a few float32 ulps of the price
+    atol = 1e-6 * float(np.abs(columns[2]).max())
+    for name in NAMES:
+        np.testing.assert_allclose(results[name], expected[name], rtol=1e-5, atol=atol, err_msg=name)
+    return results
+
+@pytest.mark.parametrize("n", [30, 120, 500])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_compute_all_matches_pandas(n, seed):
+    results = assert_matches_reference(ohlcv(n, seed))
+    assert all(np.isfinite(results[name]) for name in NAMES)
+    assert results['adx'] > 0
+
+@pytest.mark.parametrize("n", [2, 10, RSI_PERIOD])
+def test_short_history_has_no_rsi_or_bands(n):
+    results = assert_matches_reference(ohlcv(n))
+    assert np.isnan(results['rsi'])
+    assert np.isnan(results['bb_middle'])
+    assert np.isnan(results['atr'])
+    assert results['adx'] == 0.0
+
+@pytest.mark.parametrize("n", [RSI_PERIOD + 1, BB_PERIOD, 2 * ADX_PERIOD - 1])
+def test_adx_needs_two_periods(n):
+    results = assert_matches_reference(ohlcv(n))
+    assert np.isfinite(results['rsi'])
+    assert np.isnan(results['bb_middle']) == (n < BB_PERIOD)
+    assert results['adx'] == 0.0
+
+def test_first_adx_value():
+    assert assert_matches_reference(ohlcv(2 * ADX_PERIOD))['adx'] > 0
+
+def test_flat_series():
+    columns = np.full((4, 60), 20000.0, dtype=np.float32)
+    columns[3] = 1000.0
+    results = assert_matches_reference(columns)
+
+    assert results['vwap'] == 20000.0
+    assert results['atr'] == 0.0
+    assert results['adx'] == 0.0
+    assert results['bb_upper'] == results['bb_lower'] == 20000.0
+    # No gains and no losses: RSI is undefined
+    assert np.isnan(results['rsi'])
+
+def test_zero_volume():
+    columns = ohlcv(60)
+    columns[3] = 0.0
+    results = assert_matches_reference(columns)
+
+    assert np.isnan(results['vwap'])
+    assert np.isfinite(results['rsi'])
+
+def stack(histories):
+    """Right-align histories into (4, symbols, bars) blocks as /analyze_all does"""
+    lengths = np.array([h.shape[1] for h in histories], dtype=np.int64)
+    n_bars = int(lengths.max())
+    stacked = np.zeros((4, len(histories), n_bars), dtype=np.float32)
+    for i, h in enumerate(histories):
+        stacked[:, i, n_bars - h.shape[1]:] = h
+    return stacked, n_bars - lengths
+
+def test_compute_batch_rows_match_compute_all():
+    histories = [ohlcv(63, seed=3), ohlcv(60, seed=4), ohlcv(10, seed=5)]
+    stacked, starts = stack(histories)
+
+    results = compute_batch(*stacked, starts)
+
+    assert results.shape == (len(histories), len(NAMES))
+    for row, columns in zip(results, histories):
+        # NaN-aware; fast-math may reassociate the inlined copy's sums differently
+        np.testing.assert_allclose(row, np.array(compute_all(*columns), dtype=np.float64), rtol=1e-12)
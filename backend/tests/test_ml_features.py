@@ -0,0 +1,71 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    # The manager creates its model directory relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    ml_predictions = importlib.import_module("app.routers.ml_predictions")
+    return ml_predictions.MLModelManager()
+
+def ohlcv(close: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            'Open': close,
+            'High': close * 1.01,
+            'Low': close * 0.99,
+            'Close': close,
+            'Volume': np.full(len(close), 1000.0)
+        },
+        index=pd.date_range('2024-01-01', periods=len(close))
+    )
+
+def test_prepare_features_computes_bb_position(manager):
+    rng = np.random.default_rng(0)
+    close = 20000 * np.exp(np.cumsum(rng.normal(0, 0.01, 80)))
+
+    features = manager.prepare_features(ohlcv(close))
+
+    assert not features.empty
+    expected = (features['close'] - features['bb_lower']) / (features['bb_upper'] - features['bb_lower'])
+    np.testing.assert_allclose(features['bb_position'], expected)
+
+def test_prepare_features_drops_rows_with_collapsed_bands(manager):
+    rng = np.random.default_rng(1)
+    # 50 moving bars followed by 30 flat ones: the last 11 bars have a fully flat 20-bar window
+    close = np.concatenate([20000 * np.exp(np.cumsum(rng.normal(0, 0.01, 50))), np.full(30, 20000.0)])
+    data = ohlcv(close)
+
+    features = manager.prepare_features(data)
+
+    assert np.isfinite(features['bb_position']).all()
+    flat_window = data.index[50 + 19:]
+    assert features.index.intersection(flat_window).empty
+
+@pytest.fixture
+def worker_manager(manager, monkeypatch):
+    # _predict_in_worker uses the module-level manager of the pool process
+    ml_predictions = importlib.import_module("app.routers.ml_predictions")
+    monkeypatch.setattr(ml_predictions, "ml_manager", manager)
+    return ml_predictions
+
+def test_predict_in_worker_uses_training_columns(worker_manager):
+    rng = np.random.default_rng(2)
+    data = ohlcv(20000 * np.exp(np.cumsum(rng.normal(0, 0.01, 120))))
+
+    training = worker_manager._train_in_worker("NIFTY", data)
+    result, prepared = worker_manager._predict_in_worker("NIFTY", data, "random_forest", None)
+
+    assert training["feature_count"] == prepared.shape[1]
+    assert np.isfinite(result["predicted_price"])
+    assert result["current_price"] == data['Close'].iloc[-1]
+
+    cached_result, cached_prepared = worker_manager._predict_in_worker(
+        "NIFTY", data, "random_forest", prepared
+    )
+
+    assert cached_prepared is None
+    assert cached_result == result